@@ -0,0 +1,201 @@
+# --- 診斷邏輯：趨勢分 / 支撐壓力 / 策略分類 / 量能比 / 投資建議 (不依賴 Streamlit) ---
+# 規則函式的參數可為純量 (單檔最新一根) 或 NumPy 陣列 (多檔 / 每一根)，同一套規則兩邊共用；
+# diagnose() 輸入 OHLCV，輸出可直接轉 JSON 的結構化診斷
+import math
+import numpy as np
+from indicators import add_indicators
+from perf import traced
+
+STRATEGY_NAMES = {"A": "強勢多頭", "B": "技術性反彈", "C": "震盪整理", "D": "空頭弱勢"}
+LEVEL_NAMES = ["月線", "季線", "布林上", "布林下", "前高"]
+
+
+def calculate_change(current, previous):
+    if previous == 0: return 0
+    return round((current - previous) / previous * 100, 2)
+
+
+def trend_score(close, sma5, sma20, prev_sma20, sma60, macd_hist):
+    # 5 分制；指標尚未算出 (NaN) 的條件一律不給分
+    close, sma5, sma20, prev_sma20, sma60, macd_hist = (
+        np.asarray(v, dtype=float) for v in (close, sma5, sma20, prev_sma20, sma60, macd_hist))
+    with np.errstate(invalid="ignore"):
+        score = ((close > sma20).astype(int) + (close > sma60) + (sma20 > prev_sma20)
+                 + ((sma5 > sma20) & (sma20 > sma60)) + (macd_hist > 0))
+    return score
+
+
+def strategy_bucket(score, close, sma20, sma60):
+    # A 強勢多頭 (>=4) / B 站上月線但在季線下 / C 分數 2-3 / D 其餘
+    score, close, sma20, sma60 = (np.asarray(v, dtype=float) for v in (score, close, sma20, sma60))
+    with np.errstate(invalid="ignore"):
+        rebound = (close > sma20) & (close < sma60)
+    return np.select([score >= 4, rebound, score >= 2], ["A", "B", "C"], "D")
+
+
+def support_resistance(close, sma20, sma60, bbu, bbl, high_price):
+    # 回傳 (支撐價, 支撐名, 壓力價, 壓力名)；找不到時價格為 NaN、名稱為「無」
+    close = np.asarray(close, dtype=float)
+    levels = np.stack(np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (sma20, sma60, bbu, bbl, high_price))))
+    names = np.array(LEVEL_NAMES + ["無"])
+    with np.errstate(invalid="ignore"):
+        valid = levels > 0
+        above = np.where(valid & (levels > close), levels, np.inf)
+        below = np.where(valid & (levels < close), levels, -np.inf)
+    res_i, sup_i = above.argmin(axis=0), below.argmax(axis=0)
+    res_price, sup_price = above.min(axis=0), below.max(axis=0)
+    res_name = np.where(np.isfinite(res_price), names[res_i], "無")
+    sup_name = np.where(np.isfinite(sup_price), names[sup_i], "無")
+    return (np.where(np.isfinite(sup_price), sup_price, np.nan), sup_name,
+            np.where(np.isfinite(res_price), res_price, np.nan), res_name)
+
+
+def volume_ratio(volume):
+    # 今日量 / 5 日均量；盤前今日量 < 100 時改用昨日量
+    volume = np.asarray(volume, dtype=float)
+    vol_avg = volume[-5:].mean(axis=0) if len(volume) >= 5 else np.full(volume.shape[1:], np.nan)
+    vol_today = np.where(volume[-1] < 100, volume[-2], volume[-1])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(vol_avg > 0, vol_today / vol_avg, 0.0)
+
+
+def kd_cross(k, d, prev_k, prev_d):
+    if k > d and prev_k < prev_d: return "golden"
+    if k < d and prev_k > prev_d: return "death"
+    return None
+
+
+def _num(v):
+    # NaN / None → None，方便轉 JSON；NumPy 0 維陣列與純量先轉 float 再判斷
+    if v is None: return None
+    v = float(v)
+    return None if math.isnan(v) else v
+
+
+def _p(v):
+    return "-" if _num(v) is None else f"{v:.2f}"
+
+
+def strategy_advice(bucket, high_price, sma5, sma20, sma60, support, resistance):
+    # 回傳 (標題, 積極型建議, 保守型建議, 總結)；建議為條列字串
+    if bucket == "A":
+        return ("【操作策略】：多頭排列，順勢操作，沿 5日線/月線 續抱", [
+            "**進場理由**：均線多頭排列，且 MACD 紅柱，動能強勁。",
+            f"**目標價**：上方無明顯均線壓力，可參考布林上緣或波段前高 **${_p(high_price)}**。",
+            f"**防守點**：以 **5日線 (${_p(sma5)})** 為短線防守，跌破減碼。",
+        ], [
+            "**建議續抱**：長線趨勢向上，持股續抱。",
+            f"**進場時機**：若空手，建議等待股價回測 **月線 (${_p(sma20)})** 不破後再佈局，切勿追高。",
+        ], "這是一波**「強勢回升」**行情。上方空間大，下方有月線支撐，預期將沿均線震盪走高。建議**「拉回找買點」**。")
+    if bucket == "B":
+        return ("【操作策略】：短線區間操作，嚴設停損，不宜過度樂觀長抱", [
+            "**進場理由**：利用目前「股價 > 月線」且 MACD/KD 轉強的短多訊號進場搶反彈。",
+            f"**目標價**：以前方 **季線 (${_p(sma60)})** 位置或前波高點跌下來的壓力區為第一獲利了結點。",
+            f"**防守點**：以 **月線 (${_p(sma20)})** 作為防守。如果股價再次跌破月線，代表反彈失敗，應立即停損出場。",
+        ], [
+            "**建議觀望**：目前長線趨勢仍弱 (在季線下)，且月線可能尚未明顯翻揚。",
+            "**進場時機**：建議等待股價 **帶量突破季線**，或者等待月線明顯轉為上彎助漲，確認趨勢由空翻多後再進場佈局，安全性較高。",
+        ], f"這是一波**「技術性反彈」**，而非回升行情。上方有季線壓力 (${_p(sma60)})，下方有月線支撐，預期短期內會在均線之間震盪整理。建議**「買黑不買紅」** (回測支撐不破時買進)，並隨時注意量能是否放大以突破僵局。")
+    if bucket == "C":
+        return ("【操作策略】：箱型區間操作，高出低進", [
+            "**進場理由**：指標位於低檔 (如 KD 金叉) 或回測支撐有守。",
+            f"**目標價**：區間上緣或 **{resistance['name']} (${_p(resistance['price'])})**。",
+            f"**防守點**：區間下緣或 **{support['name']} (${_p(support['price'])})**。",
+        ], [
+            "**建議觀望**：趨勢不明確，均線糾結。",
+            "**進場時機**：等待帶量突破區間上緣後再追價。",
+        ], "目前處於**「多空拉鋸」**階段。方向尚未明確，操作難度高，建議**「多看少做」**。")
+    return ("【操作策略】：趨勢偏空，反彈站在賣方，空手者勿接刀", [
+        f"**操作建議**：不建議做多。若有期貨/融券資格，可於反彈至 **月線 (${_p(sma20)})** 附近不過時嘗試放空。",
+        "**防守點**：站回月線即停損。",
+    ], [
+        "**建議觀望**：全均線蓋頭反壓，跌勢未止。",
+        "**進場時機**：**完全不建議進場**。需等待底部型態 (如 W底) 出現且站上頸線。",
+    ], "目前呈現**「空頭修正」**格局。上方層層套牢賣壓，反彈皆視為逃命波。建議**「保留現金」**，等待落底訊號。")
+
+
+def diagnose_rows(latest, prev, high_price, vol_ratio):
+    # latest / prev：含 Close 與指標欄位的最新兩根 (dict 或 Series)
+    close = float(latest['Close'])
+    sma5, sma20, sma60 = latest.get('SMA_5'), latest.get('SMA_20'), latest.get('SMA_60')
+    prev_sma20 = prev.get('SMA_20', 0)
+    bbu, bbl = latest.get('BBU_20_2.0'), latest.get('BBL_20_2.0')
+    macd_hist = latest.get('MACDh_12_26_9', 0)
+    k, d = latest.get('STOCHk_14_3_3', 50), latest.get('STOCHd_14_3_3', 50)
+    prev_k, prev_d = prev.get('STOCHk_14_3_3', 50), prev.get('STOCHd_14_3_3', 50)
+
+    sup_p, sup_n, res_p, res_n = support_resistance(close, sma20, sma60, bbu, bbl, high_price)
+    support = {"price": _num(sup_p), "name": str(sup_n)}
+    resistance = {"price": _num(res_p), "name": str(res_n)}
+    score = int(trend_score(close, sma5, sma20, prev_sma20, sma60, macd_hist))
+    bucket = str(strategy_bucket(score, close, sma20, sma60))
+    cross = kd_cross(k, d, prev_k, prev_d)
+
+    trend_msgs = [
+        "✅ 股價 > 月線 (20MA)" if close > sma20 else "🔻 股價 < 月線 (20MA)",
+        "✅ 月線翻揚向上" if sma20 > prev_sma20 else "🔻 月線下彎或持平",
+        "✅ 股價 > 季線 (60MA)" if close > sma60 else "🔻 股價 < 季線 (長線弱)",
+        "✅ MACD 紅柱" if macd_hist > 0 else "🔻 MACD 綠柱",
+    ]
+    mom_msgs = [{"golden": "🔥 KD 黃金交叉", "death": "❄️ KD 死亡交叉"}.get(cross, "⚪ KD 無明顯訊號")]
+    if vol_ratio > 1.5: vol_msgs = [f"🔥 爆量 ({vol_ratio:.1f}x)"]
+    elif vol_ratio < 0.6: vol_msgs = [f"💤 量縮 ({vol_ratio:.1f}x)"]
+    else: vol_msgs = [f"⚪ 溫和 ({vol_ratio:.1f}x)"]
+
+    title, aggressive, conservative, summary = strategy_advice(bucket, high_price, sma5, sma20, sma60, support, resistance)
+    return {
+        "close": close,
+        "change_pct": calculate_change(close, float(prev['Close'])),
+        "high_price": _num(high_price),
+        "support": support,
+        "resistance": resistance,
+        "score": score,
+        "bucket": bucket,
+        "strategy": STRATEGY_NAMES[bucket],
+        "indicators": {
+            "sma5": _num(sma5), "sma20": _num(sma20), "sma60": _num(sma60), "rsi": _num(latest.get('RSI_14')),
+            "k": _num(k), "d": _num(d), "macd_hist": _num(macd_hist), "bbu": _num(bbu), "bbl": _num(bbl),
+        },
+        "kd_cross": cross,
+        "volume_ratio": float(vol_ratio),
+        "trend_msgs": trend_msgs,
+        "momentum_msgs": mom_msgs,
+        "volume_msgs": vol_msgs,
+        "advice": {"title": title, "aggressive": aggressive, "conservative": conservative, "summary": summary},
+    }
+
+
+@traced("scoring")
+def diagnose(df):
+    # df：OHLCV (可已含指標欄位)，至少兩根
+    if 'SMA_20' not in df: df = add_indicators(df)
+    latest, prev = df.iloc[-1], df.iloc[-2]
+    report = diagnose_rows(latest, prev, float(df['High'].max()), float(volume_ratio(df['Volume'])))
+    report["as_of"] = df.index[-1].isoformat()
+    return report
+
+
+def twii_summary(df):
+    # 加權指數：站穩月線 / KD 黃金交叉 短評
+    if 'SMA_20' not in df: df = add_indicators(df)
+    latest, prev = df.iloc[-1], df.iloc[-2]
+    close = float(latest['Close'])
+    sma20 = latest.get('SMA_20', 0)
+    comment = "大盤站穩月線之上，多頭格局不變。" if close > sma20 else "大盤跌破月線，短線轉弱整理。"
+    k, d = latest.get('STOCHk_14_3_3', 50), latest.get('STOCHd_14_3_3', 50)
+    if kd_cross(k, d, prev.get('STOCHk_14_3_3', 50), prev.get('STOCHd_14_3_3', 50)) == "golden":
+        comment += " 且 **KD 黃金交叉**，有反彈機會。"
+    return {
+        "close": close,
+        "change_pct": calculate_change(close, float(prev['Close'])),
+        "volume_ratio": float(latest['Volume'] / df['Volume'].rolling(5).mean().iloc[-1]),
+        "comment": comment,
+    }
+
+
+def us_comment(sox_chg, vix_chg):
+    # 回傳 (等級, 文字)，等級對應 st.info / st.warning / st.success
+    if sox_chg > 1: return "info", "🔥 **極度樂觀**：費半強勢，有利台股電子族群開高。"
+    if sox_chg < -1: return "info", "❄️ **空方壓力**：半導體回檔，提防外資提款權值股。"
+    if vix_chg > 5: return "warning", "⚠️ **避險升溫**：VIX 飆高，市場波動恐加大。"
+    return "success", "⚖️ **區間震盪**：方向未明，個股表現為主。"
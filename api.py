@@ -0,0 +1,78 @@
+# --- 無介面診斷 API：CLI 與本機 HTTP 端點 ---
+# CLI：  python api.py 2330.TW --period 6mo
+# HTTP： python api.py --serve --port 8765
+#        GET /diagnose?symbol=2330.TW&period=6mo   → JSON 診斷
+#        GET /health
+#        GET /metrics                              → Prometheus 文字格式 (各階段耗時 / 快取 / 錯誤)
+import argparse
+import json
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from analysis import diagnose
+from data import PERIOD_OFFSETS, get_history
+from names import get_stock_name
+from perf import recorder
+
+
+def diagnose_symbol(symbol, period="6mo"):
+    if period not in PERIOD_OFFSETS: raise ValueError(f"不支援的週期: {period}")
+    df = get_history(symbol, period)
+    if len(df) < 2: raise LookupError(f"查無資料: {symbol} (台股請加 .TW)")
+    report = diagnose(df)
+    report.update({"symbol": symbol.strip().upper(), "name": get_stock_name(symbol), "period": period})
+    return report
+
+
+class Handler(BaseHTTPRequestHandler):
+    def _send(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_text(self, status, text, content_type="text/plain; version=0.0.4; charset=utf-8"):
+        data = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        if url.path == "/health": return self._send(200, {"status": "ok"})
+        if url.path == "/metrics": return self._send_text(200, recorder.prometheus())
+        if url.path != "/diagnose": return self._send(404, {"error": "not found"})
+        if "symbol" not in query: return self._send(400, {"error": "缺少 symbol 參數"})
+        try:
+            self._send(200, diagnose_symbol(query["symbol"], query.get("period", "6mo")))
+        except ValueError as e: self._send(400, {"error": str(e)})
+        except LookupError as e: self._send(404, {"error": str(e)})
+        except Exception as e: self._send(502, {"error": f"分析錯誤: {e}"})
+
+
+def serve(host="127.0.0.1", port=8765):
+    server = ThreadingHTTPServer((host, port), Handler)
+    print(f"serving on http://{host}:{port}", file=sys.stderr)
+    server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="短線操作 診斷 API")
+    parser.add_argument("symbol", nargs="?")
+    parser.add_argument("--period", default="6mo", choices=list(PERIOD_OFFSETS))
+    parser.add_argument("--serve", action="store_true")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    if args.serve: return serve(args.host, args.port)
+    if not args.symbol: parser.error("請輸入股票代號或使用 --serve")
+    print(json.dumps(diagnose_symbol(args.symbol, args.period), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# --- 策略回測：每一根 K 棒都算趨勢分 / 策略分類，統計各策略之後的報酬、命中率、回檔 ---
+# 用法：python backtest.py 2330.TW 2317.TW ... [--period 10y] [--horizons 5 20 60]
+#       python backtest.py --all   (使用名稱目錄裡的全部上市櫃代號)
+# 訊號以當根收盤判定，報酬自當根收盤起算，不含交易成本
+import argparse
+import os
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from analysis import STRATEGY_NAMES, strategy_bucket, trend_score
+from data import PERIOD_OFFSETS
+from indicators import COLUMNS, compact, compute
+from screener import by_market
+
+HORIZONS = (5, 20, 60)
+BUCKETS = list(STRATEGY_NAMES) + ["ALL"]
+# 各策略預期方向：A/B 看多、D 看空、C 看盤整 (期間漲跌幅在 ±band 內算命中)
+DIRECTION = {"A": 1, "B": 1, "C": 0, "D": -1}
+# sums 的欄位：樣本數 / 報酬和 / 報酬平方和 / 上漲數 / 命中數 / 回檔和
+N_STATS = 6
+
+
+def forward_returns(close, h):
+    # 第 t 根收盤買進、持有 h 根後的報酬；尾端不足 h 根者為 NaN
+    out = np.full(close.shape, np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out[:-h] = close[h:] / close[:-h] - 1
+    return out
+
+
+def forward_drawdown(close, low, h):
+    # 持有期間 (t+1 ~ t+h) 最低價相對進場收盤的跌幅
+    out = np.full(close.shape, np.nan)
+    if len(close) <= h: return out
+    path_low = sliding_window_view(low[1:], h, axis=0).min(axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out[:-h] = path_low / close[:-h] - 1
+    return out
+
+
+def bar_buckets(block):
+    # block: {欄位: (日期 × 代號) ndarray}；回傳每一根的 (趨勢分, 策略代碼)，指標未齊者策略為空字串
+    ind = dict(zip(COLUMNS, compute({k: block[k] for k in ("High", "Low", "Close")}).transpose(1, 0, 2)))
+    close, sma20 = block["Close"], ind["SMA_20"]
+    prev_sma20 = np.vstack([np.full((1, sma20.shape[1]), np.nan), sma20[:-1]])
+    score = trend_score(close, ind["SMA_5"], sma20, prev_sma20, ind["SMA_60"], ind["MACDh_12_26_9"])
+    bucket = strategy_bucket(score, close, sma20, ind["SMA_60"])
+    ready = np.isfinite(close) & np.isfinite(ind["SMA_60"]) & np.isfinite(prev_sma20)
+    return score, np.where(ready, bucket, "")
+
+
+def _block_stats(block, horizons, band):
+    # 單批代號的彙總量：sums (策略, 天期, N_STATS) 與 worst (策略, 天期)，跨批次可直接相加 / 取最小
+    # 缺值不補 (compact)：下市後沒有後續 K 棒，報酬自然為 NaN 而不是 0%
+    block = compact({k: v.values.astype(float) for k, v in block.items()})
+    _, bucket = bar_buckets(block)
+    sums = np.zeros((len(BUCKETS), len(horizons), N_STATS))
+    worst = np.full((len(BUCKETS), len(horizons)), np.nan)
+    for j, h in enumerate(horizons):
+        ret = forward_returns(block["Close"], h)
+        dd = forward_drawdown(block["Close"], block["Low"], h)
+        valid = (bucket != "") & np.isfinite(block["Close"]) & np.isfinite(ret) & np.isfinite(dd)
+        for i, b in enumerate(BUCKETS):
+            mask = valid if b == "ALL" else valid & (bucket == b)
+            r, d = ret[mask], dd[mask]
+            if not len(r): continue
+            direction = DIRECTION.get(b)
+            hit = (np.abs(r) <= band) if direction == 0 else (np.sign(r) == direction) if direction else r > 0
+            sums[i, j] = (len(r), r.sum(), (r * r).sum(), (r > 0).sum(), hit.sum(), d.sum())
+            worst[i, j] = d.min()
+    return sums, worst
+
+
+def evaluate(wide, horizons=HORIZONS, band=0.05, max_workers=None, chunk=250):
+    # wide: {欄位: (日期 × 代號) DataFrame}，如 BarStore.history_panel 的回傳值；
+    # 多個市場時傳入串列 (每個市場一份)，各自的日期軸分開計算後再合併統計
+    blocks = []
+    for panel in [wide] if isinstance(wide, dict) else wide:
+        codes = list(panel["Close"].columns)
+        blocks += [{k: v[codes[i:i + chunk]] for k, v in panel.items()} for i in range(0, len(codes), chunk)]
+    if not blocks: return pd.DataFrame()
+    # 與 screener 相同：分批丟給執行緒，NumPy 運算期間釋放 GIL
+    with ThreadPoolExecutor(max_workers or os.cpu_count()) as pool:
+        parts = list(pool.map(lambda b: _block_stats(b, horizons, band), blocks))
+    sums = sum(p[0] for p in parts)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # 全部批次皆無樣本的格子維持 NaN
+        worst = np.nanmin(np.stack([p[1] for p in parts]), axis=0)
+    rows = []
+    for i, b in enumerate(BUCKETS):
+        for j, h in enumerate(horizons):
+            n, total, sq, up, hit, dd = sums[i, j]
+            if not n: continue
+            mean = total / n
+            rows.append({
+                "策略": STRATEGY_NAMES.get(b, "全部"), "天期": h, "樣本數": int(n),
+                "平均報酬%": round(mean * 100, 2),
+                "報酬標準差%": round(np.sqrt(max(sq / n - mean * mean, 0)) * 100, 2),
+                "上漲機率%": round(up / n * 100, 1), "命中率%": round(hit / n * 100, 1),
+                "平均回檔%": round(dd / n * 100, 2), "最大回檔%": round(worst[i, j] * 100, 2),
+            })
+    return pd.DataFrame(rows).set_index(["策略", "天期"]) if rows else pd.DataFrame()
+
+
+def run(symbols, store, period="10y", **kwargs):
+    panels = [store.history_panel(group, period) for group in by_market(symbols)]
+    return evaluate([w for w in panels if not w["Close"].empty], **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="短線操作 策略回測")
+    parser.add_argument("symbols", nargs="*")
+    parser.add_argument("--all", action="store_true", help="回測名稱目錄中的全部代號")
+    parser.add_argument("--period", default="10y", choices=list(PERIOD_OFFSETS))
+    parser.add_argument("--horizons", type=int, nargs="+", default=list(HORIZONS))
+    parser.add_argument("--band", type=float, default=0.05, help="震盪整理的命中區間 (±)")
+    args = parser.parse_args()
+    symbols = [s.upper() for s in args.symbols]
+    if args.all:
+        from names import get_directory
+        directory = get_directory()
+        if not directory.names: directory.warm()
+        symbols += directory.symbols()
+    if not symbols: parser.error("請輸入股票代號或使用 --all")
+    from data import get_store
+    result = run(symbols, get_store(), args.period, horizons=tuple(args.horizons), band=args.band)
+    with pd.option_context("display.width", 200, "display.max_columns", None, "display.unicode.east_asian_width", True):
+        print(result.to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# --- 圖表管線：原本全解析度 SVG 圖 vs 合併 K 棒 + WebGL + 快取 ---
+# 用法：python bench/bench_charts.py [--runs 10]
+# payload 以 Streamlit 送往瀏覽器的同一種序列化 (plotly.io.to_json) 量測；點數為前端需繪製的資料點總數
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.subplots import make_subplots
+from fixtures import load_history
+import charts
+from indicators import add_indicators
+
+
+def legacy_figure(df):
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, vertical_spacing=0.05, row_width=[0.2, 0.7])
+    fig.add_trace(go.Candlestick(x=df.index, open=df['Open'], high=df['High'], low=df['Low'], close=df['Close'], name='K線', increasing_line_color='red', decreasing_line_color='green'), row=1, col=1)
+    fig.add_trace(go.Scatter(x=df.index, y=df['SMA_5'], line=dict(color='orange', width=1), name='5MA'), row=1, col=1)
+    fig.add_trace(go.Scatter(x=df.index, y=df['SMA_20'], line=dict(color='blue', width=1), name='月線'), row=1, col=1)
+    fig.add_trace(go.Scatter(x=df.index, y=df['SMA_60'], line=dict(color='green', width=1), name='季線'), row=1, col=1)
+    fig.add_trace(go.Scatter(x=df.index, y=df['BBU_20_2.0'], line=dict(color='gray', width=1, dash='dot'), name='布林上'), row=1, col=1)
+    fig.add_trace(go.Scatter(x=df.index, y=df['BBL_20_2.0'], line=dict(color='gray', width=1, dash='dot'), fill='tonexty', fillcolor='rgba(200,200,200,0.1)', name='布林下'), row=1, col=1)
+    colors = np.where(df['Close'] >= df['Open'], 'red', 'green')
+    fig.add_trace(go.Bar(x=df.index, y=df['Volume'], marker_color=colors, name='量'), row=2, col=1)
+    fig.update_layout(xaxis_rangeslider_visible=False, height=450, margin=dict(l=0, r=0, t=10, b=0), showlegend=False)
+    return fig
+
+
+def serialize(fig):
+    # 與 st.plotly_chart 相同：to_dict 後不驗證直接轉 JSON
+    return pio.to_json(fig.to_dict(), validate=False)
+
+
+def best(fn, runs):
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def points(fig):
+    return sum(len(t.x) for t in fig.data)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+    for period in ("1y", "5y", "10y"):
+        df = add_indicators(load_history("2330.TW", period))
+        old, new = legacy_figure(df), charts.stock_chart("2330.TW", period, df)
+        t_old = best(lambda: serialize(legacy_figure(df)), args.runs)
+        charts.clear()
+        t_cold = best(lambda: (charts.clear(), serialize(charts.stock_chart("2330.TW", period, df))), args.runs)
+        t_hot = best(lambda: serialize(charts.stock_chart("2330.TW", period, df)), args.runs)
+        print(f"{period:4s} {len(df):5d} bars  "
+              f"legacy {t_old * 1000:6.1f} ms {len(serialize(old)) / 1024:7.1f} KiB {points(old):6d} pts  |  "
+              f"new cold {t_cold * 1000:6.1f} ms  cached {t_hot * 1000:6.1f} ms "
+              f"{len(serialize(new)) / 1024:7.1f} KiB {points(new):6d} pts")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# --- 指標引擎 vs pandas_ta 串接呼叫 (1 年 / 10 年日線) ---
+# 用法：python bench/bench_indicators.py [--runs 20]
+# 有安裝 pandas_ta 時同時比對數值並計算加速倍數
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+from fixtures import load_history
+from indicators import COLUMNS, add_indicators
+
+try:
+    import pandas_ta  # noqa: F401
+except ImportError:
+    pandas_ta = None
+
+
+def pandas_ta_chain(df):
+    df = df.copy()
+    df.ta.sma(length=5, append=True)
+    df.ta.sma(length=20, append=True)
+    df.ta.sma(length=60, append=True)
+    df.ta.rsi(length=14, append=True)
+    df.ta.stoch(append=True)
+    df.ta.macd(append=True)
+    df.ta.bbands(length=20, std=2, append=True)
+    colors = ['red' if row['Close'] >= row['Open'] else 'green' for index, row in df.iterrows()]
+    return df, colors
+
+
+def engine(df):
+    df = add_indicators(df)
+    colors = np.where(df['Close'] >= df['Open'], 'red', 'green')
+    return df, colors
+
+
+def best(fn, df, runs):
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn(df)
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+    if pandas_ta is None: print("(未安裝 pandas_ta，只量測新引擎)")
+    for period in ("1y", "10y"):
+        df = load_history("2330.TW", period)
+        t_new = best(engine, df, args.runs)
+        line = f"{period:4s} {len(df):5d} bars  engine {t_new * 1000:7.2f} ms"
+        if pandas_ta is not None:
+            t_old = best(pandas_ta_chain, df, args.runs)
+            ours, theirs = engine(df)[0], pandas_ta_chain(df)[0]
+            diff = np.nanmax(np.abs(ours[COLUMNS].values - theirs[COLUMNS].values))
+            line += f"  pandas_ta {t_old * 1000:7.2f} ms  speedup {t_old / t_new:5.1f}x  max|diff| {diff:.2e}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# --- 美股指數抓取：逐檔串行 vs 批次並行 (延遲模型，不連網) ---
+# 用法：python bench/bench_quotes.py [--latency 0.25] [--runs 5]
+# 注意：這是模型，不是實測。上游以 sleep(latency) 代替，並假設 yf.download 每檔一條執行緒、彼此完全並行，
+# 所以加速倍數在構造上就接近檔數 (串行 ≈ 檔數 × latency，批次 ≈ latency)；它只驗證程式確實走批次路徑、
+# 沒有額外的串行開銷。真實加速取決於 Yahoo 端的限流與連線重用，需連網另行量測。
+# 行情取自 bench/fixtures 的錄製檔，沒有錄製檔時為模擬資料 (輸出會標明)
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import yfinance as yf
+import pandas as pd
+from fixtures import load_history, provenance
+from data import fetch_index_quotes
+
+INDICES = ('^DJI', '^IXIC', '^SOX', '^VIX')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.25, help="每次上游請求的模擬往返秒數")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    recorded = {t: load_history(t, "5d") for t in INDICES}
+    print(f"延遲模型：每次往返 sleep {args.latency * 1000:.0f} ms，批次時每檔一條執行緒完全並行；資料來源 {provenance()['source']}")
+
+    # 每檔 history 呼叫 = 一次往返
+    def fake_history(self, period="1mo", **kwargs):
+        time.sleep(args.latency)
+        return recorded[self.ticker].tail(int(period[:-1]) if period.endswith("d") else None)
+
+    # yf.download(threads=True) 內部每檔一條執行緒並行抓取
+    def fake_download(tickers, **kwargs):
+        def one(t):
+            time.sleep(args.latency)
+            return recorded[t]
+        with ThreadPoolExecutor(len(tickers)) as pool:
+            frames = dict(zip(tickers, pool.map(one, tickers)))
+        return pd.concat(frames, axis=1)
+
+    def legacy_loop():
+        out = {}
+        for t in INDICES:
+            df = yf.Ticker(t).history(period="2d")
+            if len(df) >= 2: out[t] = (df['Close'].iloc[-1], df['Close'].iloc[-2])
+        return out
+
+    results = {}
+    with mock.patch.object(yf.Ticker, "history", fake_history), mock.patch.object(yf, "download", fake_download):
+        for label, fn in [("serial_loop", legacy_loop), ("batched", lambda: fetch_index_quotes(INDICES))]:
+            times = []
+            for _ in range(args.runs):
+                t0 = time.perf_counter()
+                fn()
+                times.append(time.perf_counter() - t0)
+            results[label] = min(times)
+            print(f"{label:12s} {results[label] * 1000:8.1f} ms")
+    print(f"speedup      {results['serial_loop'] / results['batched']:8.1f}x  (模型值，上限約為檔數 {len(INDICES)}x，非實測)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# --- 離線重播環境：yfinance 改讀錄製 / 模擬 K 線，Yahoo 奇摩 API 指向本地替身伺服器 ---
+# 必須在匯入 data / names 等模組之前呼叫 install()，環境變數才會生效
+import json
+import os
+import sys
+import tempfile
+import time
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pandas as pd
+import yfinance as yf
+from fixtures import PERIOD_BARS, fixture_path, load_history
+import standin
+
+_master = {}
+
+
+def bars(symbol):
+    # 每檔以錄到的最長日線為母資料 (沒有錄製檔時為 10 年模擬資料)，日期平移到今天收盤，讓 TTL / 增量邏輯照真實時間運作
+    if symbol not in _master:
+        recorded = [p for p in sorted(PERIOD_BARS, key=PERIOD_BARS.get, reverse=True) if os.path.exists(fixture_path(symbol, p))]
+        df = load_history(symbol, recorded[0] if recorded else "10y")
+        today = pd.Timestamp.now(tz=df.index.tz).normalize()
+        df.index = df.index + (today - df.index[-1].normalize())
+        _master[symbol] = df
+    return _master[symbol]
+
+
+def _slice(symbol, period=None, start=None):
+    df = bars(symbol)
+    if start is not None: return df[df.index >= pd.Timestamp(start, tz=df.index.tz)]
+    return df.tail(PERIOD_BARS.get(period, 126))
+
+
+def install(latency=0.0, workdir=None, names=None):
+    # latency：每次上游往返的模擬秒數 (yf.download 整批算一次)；回傳 (工作目錄, 替身伺服器網址)
+    workdir = workdir or tempfile.mkdtemp(prefix="short-bench-")
+    server, base = standin.start()
+    os.environ.update({
+        "SHORT_BAR_STORE": os.path.join(workdir, "bars.sqlite"),
+        "SHORT_NAMES_PATH": os.path.join(workdir, "names.json"),
+        "SHORT_TW_API": base + "/tw",
+    })
+    # 預先寫好名稱目錄 (更新時間 = 現在)，背景更新執行緒不會去連上市櫃開放資料
+    with open(os.environ["SHORT_NAMES_PATH"], "w", encoding="utf-8") as f:
+        json.dump({"updated": time.time(), "names": names or {"2330.TW": "台積電"}}, f, ensure_ascii=False)
+
+    def history(self, period=None, start=None, interval="1d", **kwargs):
+        time.sleep(latency)
+        return _slice(self.ticker, period, start)
+
+    def download(tickers, period=None, start=None, **kwargs):
+        time.sleep(latency)
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        return pd.concat({t: _slice(t, period, start) for t in tickers}, axis=1)
+
+    for patch in (mock.patch.object(yf.Ticker, "history", history), mock.patch.object(yf, "download", download)):
+        patch.start()
+    return workdir, base
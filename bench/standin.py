@@ -0,0 +1,140 @@
+# --- 本地替身 HTTP 伺服器：重播錄好的 Yahoo 回應，沒有錄製檔時產生固定的模擬資料 ---
+# 啟動：python bench/standin.py [--port 8766]
+# 使用：SHORT_TW_API=http://127.0.0.1:8766/tw streamlit run short.py  (K 線仍走 yfinance；完全離線請用 replay.install)
+# 錄製 (需連網)：python bench/standin.py --record "/tw/StockServices.rank;exchange=TAI;limit=10;period=day;rankType=industry"
+#               python bench/standin.py --record-sectors   (族群排行 + 各族群成分股全部分頁)
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+from fixtures import FIXTURE_DIR, synthetic_history
+
+HTTP_DIR = os.path.join(FIXTURE_DIR, "http")
+UPSTREAM = {"/tw": "https://tw.stock.yahoo.com/_td-stock/api/resource"}
+SECTORS = {"半導體業": 72, "電子零組件業": 84, "航運業": 45, "金融保險業": 51, "生技醫療業": 66}  # 族群 → 成分股數
+PAGE_SIZE = 30
+RANK_PATH = "/tw/StockServices.rank;exchange=TAI;limit=10;period=day;rankType=industry"
+QUOTES_PATH = "/tw/StockServices.getClassQuotes;exchange=TAI;offset={offset};sectorId={sector_id}"
+MAX_PAGES = 10
+
+
+def payload_path(path):
+    return os.path.join(HTTP_DIR, re.sub(r"[^\w.-]", "_", path.strip("/")) + ".json")
+
+
+def _params(path):
+    # Yahoo 奇摩 API 參數以 ; 串在路徑上
+    return dict(p.split("=", 1) for p in path.split(";")[1:] if "=" in p)
+
+
+def _members(sector_id):
+    sizes = list(SECTORS.values())
+    size = sizes[sector_id - 1] if 0 < sector_id <= len(sizes) else 0
+    rng = np.random.default_rng(sector_id)
+    return [f"{code}.TW" for code in rng.choice(np.arange(1101, 9999), size=size, replace=False)]
+
+
+def synthetic(path):
+    if "StockServices.rank" in path:
+        rng = np.random.default_rng(0)
+        return {"list": [{"sectorId": i + 1, "symbolName": name, "changePercent": f"{rng.normal(0, 1.5):.2f}"}
+                         for i, name in enumerate(SECTORS)]}
+    if "StockServices.getClassQuotes" in path:
+        params = _params(path)
+        offset, symbols = int(params.get("offset", 0)), _members(int(params.get("sectorId", 0)))
+        page = []
+        for symbol in symbols[offset:offset + PAGE_SIZE]:
+            bars = synthetic_history(symbol, 2)
+            close, prev = bars["Close"].iloc[-1], bars["Close"].iloc[-2]
+            page.append({"symbol": symbol, "symbolName": symbol[:4], "price": {"raw": f"{close:.2f}"},
+                         "changePercent": f"{(close / prev - 1) * 100:+.2f}%", "volume": str(int(bars["Volume"].iloc[-1]))})
+        next_offset = offset + PAGE_SIZE if offset + PAGE_SIZE < len(symbols) else None
+        return {"list": page, "pagination": {"resultsTotal": len(symbols), "nextOffset": next_offset}}
+    if "AutocompleteService" in path:
+        stock_id = _params(path).get("query", "")
+        return {"result": [{"symbol": f"{stock_id}.TW", "name": f"測試{stock_id}"}]}
+    if "StockServices.stockId" in path:
+        return {"symbolName": f"測試{_params(path).get('stockId', '')}"}
+    return None
+
+
+class Server(ThreadingHTTPServer):
+    # 預設 backlog 只有 5，多人併發時 SYN 被丟掉會多等 1 秒重送，量到的是替身而不是程式本身
+    request_queue_size = 128
+
+
+class Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args): pass
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        try:
+            with open(payload_path(path), encoding="utf-8") as f: body = f.read().encode()
+        except OSError:
+            data = synthetic(path)
+            if data is None:
+                self.send_error(404)
+                return
+            body = json.dumps(data, ensure_ascii=False).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start(host="127.0.0.1", port=0):
+    # 背景執行緒啟動，回傳 (server, base_url)；port=0 由系統挑空閒埠
+    server = Server((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="standin", daemon=True).start()
+    return server, f"http://{host}:{server.server_port}"
+
+
+def record(path):
+    import requests
+    prefix = "/" + path.strip("/").split("/", 1)[0]
+    r = requests.get(UPSTREAM[prefix] + path[len(prefix):], headers={"User-Agent": "Mozilla/5.0"}, timeout=10)
+    r.raise_for_status()
+    os.makedirs(HTTP_DIR, exist_ok=True)
+    with open(payload_path(path), "w", encoding="utf-8") as f: f.write(r.text)
+    return r.json()
+
+
+def record_sectors():
+    # 依錄到的排行逐一錄各族群的成分股分頁；回傳錄製的路徑
+    paths = [RANK_PATH]
+    for item in record(RANK_PATH).get("list", []):
+        offset = 0
+        for _ in range(MAX_PAGES):
+            paths.append(QUOTES_PATH.format(offset=offset, sector_id=item["sectorId"]))
+            data = record(paths[-1])
+            next_offset = (data.get("pagination") or {}).get("nextOffset")
+            if not data.get("list") or not next_offset or next_offset <= offset: break
+            offset = next_offset
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--record", nargs="+", metavar="PATH")
+    parser.add_argument("--record-sectors", action="store_true")
+    args = parser.parse_args()
+    if args.record or args.record_sectors:
+        for path in args.record or []: record(path)
+        if args.record_sectors: print(len(record_sectors()), "responses")
+        return
+    server = Server(("127.0.0.1", args.port), Handler)
+    print(f"stand-in on http://127.0.0.1:{args.port}  (/tw)", file=sys.stderr)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
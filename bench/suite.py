@@ -0,0 +1,216 @@
+# --- 端對端基準測試：全部重播錄製 / 模擬行情，不連網 ---
+# 用法：python bench/suite.py                  與 bench/baseline.json 比較，變慢超過容許值時結束碼為 1；
+#                                             資料來源或執行設定與基準不同時不比較 (結束碼 2 / 該項略過)
+#       python bench/suite.py --save           量測結果寫回 bench/baseline.json
+#       python bench/suite.py --only indicators figures
+# 項目：冷啟動匯入 / 首次繪製、大盤快照、單檔診斷、指標與圖表 (3mo/1y/10y)、多人併發
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+SIZES = ("3mo", "1y", "10y")
+SYMBOLS = [f"{code}.TW" for code in range(2301, 2341)]
+# 各項目的結果受哪些執行設定影響；與基準不同時該項不比較
+SCENARIO_CONFIG = {"cold_start": ("runs_cold", "latency"), "market": ("runs", "latency"), "diagnosis": ("runs", "latency"),
+                   "indicators": ("runs",), "figures": ("runs",), "concurrent": ("users", "requests", "latency")}
+# short.py 用到的第三方與本地模組
+APP_MODULES = "streamlit, plotly.graph_objects, yfinance, pandas, numpy, data, names, indicators, analysis, charts, screener, snapshot, live, breadth, perf"
+
+sys.path[:0] = [BENCH_DIR, ROOT]
+import numpy as np
+
+
+def stats(samples):
+    ms = np.array(samples) * 1000
+    return {"p50_ms": round(float(np.percentile(ms, 50)), 2), "p99_ms": round(float(np.percentile(ms, 99)), 2)}
+
+
+def timed(fn, runs):
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return samples
+
+
+def _child(args):
+    # 另開程序量測，確保是真正的冷啟動
+    out = subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def bench_cold_start(opts):
+    imports = [_child(["-c", f"import time; t = time.perf_counter(); import {APP_MODULES}; print(time.perf_counter() - t)"])
+               for _ in range(opts.runs_cold)]
+    renders = [_child([os.path.join(BENCH_DIR, "suite.py"), "--child-render", "--latency", str(opts.latency)])
+               for _ in range(opts.runs_cold)]
+    return {"import_ms": round(min(imports) * 1000, 1), "first_render_ms": round(min(renders) * 1000, 1)}
+
+
+def child_render(latency):
+    import replay
+    replay.install(latency)
+    from streamlit.testing.v1 import AppTest
+    t0 = time.perf_counter()
+    at = AppTest.from_file(os.path.join(ROOT, "short.py"), default_timeout=120).run()
+    elapsed = time.perf_counter() - t0
+    if at.exception: raise SystemExit(f"short.py 執行失敗: {at.exception[0].value}")
+    print(json.dumps(elapsed))
+
+
+def bench_market(opts):
+    from data import cache
+    from snapshot import build_snapshot
+    cache.clear()
+    cold = timed(build_snapshot, 1)
+    warm = timed(build_snapshot, opts.runs)
+    return {"cold_ms": round(cold[0] * 1000, 1), **{f"warm_{k}": v for k, v in stats(warm).items()}}
+
+
+def bench_diagnosis(opts):
+    from api import diagnose_symbol
+    from data import cache
+    cache.clear()
+    cold = [timed(lambda: diagnose_symbol(s, "6mo"), 1)[0] for s in SYMBOLS[:opts.runs]]
+    warm = timed(lambda: diagnose_symbol(SYMBOLS[0], "6mo"), opts.runs)
+    return {**{f"cold_{k}": v for k, v in stats(cold).items()}, **{f"warm_{k}": v for k, v in stats(warm).items()}}
+
+
+def bench_indicators(opts):
+    from fixtures import load_history
+    from indicators import add_indicators
+    return {period: stats(timed(lambda: add_indicators(df), opts.runs))
+            for period in SIZES for df in [load_history("2330.TW", period)]}
+
+
+def bench_figures(opts):
+    import plotly.io as pio
+    import charts
+    from fixtures import load_history
+    from indicators import add_indicators
+    result = {}
+    for period in SIZES:
+        df = add_indicators(load_history("2330.TW", period))
+        build = lambda: pio.to_json(charts.stock_figure(charts.downsample(df)).to_dict(), validate=False)
+        result[period] = {**stats(timed(build, opts.runs)), "payload_kib": round(len(build()) / 1024, 1)}
+    return result
+
+
+def bench_concurrent(opts):
+    # 多位使用者同時診斷不同代號，並各自讀一次大盤快照
+    from api import diagnose_symbol
+    from data import cache
+    from snapshot import get_scheduler
+    cache.clear()
+    scheduler = get_scheduler()
+    scheduler.get(timeout=60)  # 第一份快照另外在 market / cold_start 量測，這裡只看穩態
+    rng = random.Random(0)
+    plan = [[rng.choice(SYMBOLS) for _ in range(opts.requests)] for _ in range(opts.users)]
+
+    def user(symbols):
+        samples = []
+        for s in symbols:
+            t0 = time.perf_counter()
+            diagnose_symbol(s, "6mo")
+            scheduler.get(timeout=60)
+            samples.append(time.perf_counter() - t0)
+        return samples
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(opts.users) as pool:
+        samples = [x for part in pool.map(user, plan) for x in part]
+    wall = time.perf_counter() - t0
+    return {"users": opts.users, "requests": len(samples), "throughput_rps": round(len(samples) / wall, 1), **stats(samples)}
+
+
+SCENARIOS = {"cold_start": bench_cold_start, "market": bench_market, "diagnosis": bench_diagnosis,
+             "indicators": bench_indicators, "figures": bench_figures, "concurrent": bench_concurrent}
+
+
+def flatten(result, prefix=""):
+    out = {}
+    for k, v in result.items():
+        if isinstance(v, dict): out.update(flatten(v, f"{prefix}{k}."))
+        elif k.endswith("_ms"): out[prefix + k] = v
+    return out
+
+
+def compare(current, baseline, tolerance, min_delta_ms=1.0):
+    # 只比較耗時 (*_ms)；p99 與差距不到 min_delta_ms 的項目雜訊太大，只列出不判定退步
+    now, base = flatten(current), flatten(baseline)
+    regressions = []
+    for key in sorted(now):
+        if key not in base or not base[key]: continue
+        delta = now[key] / base[key] - 1
+        gated = not key.endswith("p99_ms") and now[key] - base[key] >= min_delta_ms
+        flag = " <-- 變慢" if gated and delta > tolerance else ""
+        print(f"  {key:36s} {base[key]:10.2f} → {now[key]:10.2f} ms  {delta:+7.1%}{flag}")
+        if flag: regressions.append(key)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="短線操作 離線基準測試")
+    parser.add_argument("--only", nargs="+", choices=list(SCENARIOS))
+    parser.add_argument("--latency", type=float, default=0.05, help="每次上游往返的模擬秒數")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--runs-cold", type=int, default=3)
+    parser.add_argument("--users", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=10, help="每位使用者的請求數")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="比基準慢多少 (比例) 算退步")
+    parser.add_argument("--save", action="store_true", help=f"寫回 {os.path.relpath(BASELINE_PATH, ROOT)}")
+    parser.add_argument("--child-render", action="store_true", help=argparse.SUPPRESS)
+    opts = parser.parse_args()
+    if opts.child_render: return child_render(opts.latency)
+
+    import replay
+    from fixtures import provenance
+    replay.install(opts.latency)
+    from perf import recorder
+    config = {k: getattr(opts, k) for k in ("runs", "runs_cold", "users", "requests", "latency")}
+    data = provenance()
+    if data["source"] == "synthetic": print("注意：bench/fixtures 沒有錄製檔，全部重播模擬行情", file=sys.stderr)
+    results = {}
+    for name in opts.only or SCENARIOS:
+        results[name] = SCENARIOS[name](opts)
+        print(f"{name}: {json.dumps(results[name], ensure_ascii=False)}", file=sys.stderr)
+    report = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "env": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "config": config,
+        "data": data,
+        "results": results,
+        "stages": recorder.summary(),  # 各階段 span 統計，供對照，不列入比較
+    }
+    if opts.save:
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f: json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"saved {BASELINE_PATH}")
+        return
+    if not os.path.exists(BASELINE_PATH):
+        print("尚無基準，請先以 --save 建立")
+        return
+    with open(BASELINE_PATH, encoding="utf-8") as f: baseline = json.load(f)
+    if "config" not in baseline: sys.exit("基準沒有記錄執行設定，無法比較，請以 --save 重建")
+    if baseline.get("data") != data: sys.exit(f"資料來源與基準不同 ({baseline.get('data')} → {data})，不比較；請以 --save 重建")
+    comparable = {}
+    for name, result in results.items():
+        if name not in baseline["results"]: continue
+        changed = {k: (baseline["config"].get(k), config[k]) for k in SCENARIO_CONFIG[name] if baseline["config"].get(k) != config[k]}
+        if changed: print(f"  {name}: 執行設定與基準不同 {changed}，略過")
+        else: comparable[name] = result
+    regressions = compare(comparable, {k: baseline["results"][k] for k in comparable}, opts.tolerance)
+    if regressions: sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# --- 熱門族群廣度：asyncio + 共用連線池並行抓全部排行族群的成分股報價，近 3 個月收盤走 BarStore 批次 ---
+# 每個族群算 上漲家數比 / 成交量加權漲跌幅 / 站上月線家數；快取 TTL 與熱門族群相同
+# 族群排行與熱門族群共用同一份快取；上游網址可用 SHORT_TW_API 指向本地替身伺服器 (bench/standin.py)
+import asyncio
+import httpx
+import numpy as np
+import pandas as pd
+from cache import market_ttl
+from data import SECTOR_HEADERS, TW_API, NoDataError, cache, get_store, get_tw_hot_sectors
+from perf import note_error, traced
+
+QUOTES_URL = TW_API + "/StockServices.getClassQuotes;exchange=TAI;offset={offset};sectorId={sector_id}"
+CONCURRENCY = 16
+MAX_PAGES = 10  # 單一族群最多翻幾頁，避免分頁資訊異常時無限迴圈
+SMA_LENGTH = 20
+
+
+def _raw(v):
+    # Yahoo 欄位可能是數字、{"raw": ...} 或 "+1.23%" / "12,345" 字串
+    if isinstance(v, dict): v = v.get("raw")
+    if isinstance(v, str): v = v.replace(",", "").replace("%", "").replace("+", "")
+    try: return float(v)
+    except (TypeError, ValueError): return np.nan
+
+
+async def _get_json(client, limit, url, **kwargs):
+    async with limit:
+        r = await client.get(url, **kwargs)
+    r.raise_for_status()
+    return r.json()
+
+
+async def _constituents(client, limit, sector_id):
+    # 同一族群的分頁只能依序抓，不同族群之間並行
+    if sector_id is None: return []
+    rows, offset = [], 0
+    for _ in range(MAX_PAGES):
+        data = await _get_json(client, limit, QUOTES_URL.format(offset=offset, sector_id=sector_id), headers=SECTOR_HEADERS)
+        page = data.get("list", [])
+        rows += page
+        next_offset = (data.get("pagination") or {}).get("nextOffset")
+        if not page or not next_offset or next_offset <= offset: break
+        offset = next_offset
+    return [{"代號": r["symbol"], "名稱": r.get("symbolName", ""), "股價": _raw(r.get("price")),
+             "漲跌幅": _raw(r.get("changePercent")), "成交量": _raw(r.get("volume"))} for r in rows if r.get("symbol")]
+
+
+def _above_sma(symbols):
+    # 最新收盤是否站上 20 日均線；K 線經 BarStore 批次取得 (本地夠新就不碰上游)，資料不足為 None
+    close = get_store().history_panel(symbols, "3mo")["Close"] if symbols else pd.DataFrame()
+    above = {}
+    for symbol in close.columns:
+        c = close[symbol].dropna().to_numpy()
+        above[symbol] = bool(c[-1] > c[-SMA_LENGTH:].mean()) if len(c) >= SMA_LENGTH else None
+    return above
+
+
+async def _fetch(sector_ids, concurrency):
+    limit = asyncio.Semaphore(concurrency)
+    pool = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(headers={"User-Agent": "Mozilla/5.0"}, limits=pool, timeout=10, verify=False) as client:
+        members = await asyncio.gather(*(_constituents(client, limit, sid) for sid in sector_ids), return_exceptions=True)
+    # 單一族群失敗只影響該族群
+    for m in members:
+        if isinstance(m, Exception): note_error(m)
+    return [[] if isinstance(m, Exception) else m for m in members]
+
+
+def _breadth(rows):
+    change, volume = rows["漲跌幅"].to_numpy(float), rows["成交量"].fillna(0).to_numpy(float)
+    quoted = np.isfinite(change)
+    weight = volume[quoted].sum()
+    return {
+        "上漲比%": round((change[quoted] > 0).mean() * 100, 1) if quoted.any() else np.nan,
+        "量加權漲跌%": round((change[quoted] * volume[quoted]).sum() / weight, 2) if weight > 0 else np.nan,
+        "站上月線": int(rows["站上月線"].eq(True).sum()),
+    }
+
+
+def fetch_sector_breadth(rank, concurrency=CONCURRENCY):
+    # rank：fetch_tw_hot_sectors 的結果 (索引為族群代號)
+    # 回傳 {"summary": 每族群一列, "members": {族群名稱: 成分股明細}}
+    if rank is None or rank.empty: raise NoDataError("查無族群排行")
+    members = asyncio.run(_fetch(list(rank.index), concurrency))
+    # 全部成分股都沒抓到就丟例外，不要把一張空表快取到下一個 TTL
+    if not any(members): raise NoDataError("查無族群成分股")
+    above = _above_sma(sorted({row["代號"] for rows in members for row in rows}))
+    summary, detail = [], {}
+    for name, change, rows in zip(rank["族群名稱"], rank["漲跌幅"], members):
+        rows = pd.DataFrame(rows, columns=["代號", "名稱", "股價", "漲跌幅", "成交量"])
+        rows["站上月線"] = rows["代號"].map(above)
+        summary.append({"族群名稱": name, "漲跌幅": change, "家數": len(rows), **_breadth(rows)})
+        detail[name] = rows.sort_values("漲跌幅", ascending=False, ignore_index=True)
+    return {"summary": pd.DataFrame(summary), "members": detail}
+
+
+@traced("breadth")
+def get_sector_breadth(fresh=False):
+    # 排行取自熱門族群的快取：建快照時剛抓過，這裡直接命中，不會再打一次
+    loader = lambda: fetch_sector_breadth(get_tw_hot_sectors(fresh=fresh))
+    try: return cache.get(("breadth",), loader, lambda: market_ttl("TW", intraday=300), allow_stale=not fresh)
+    except Exception as e:
+        note_error(e)
+        return None
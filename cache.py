@@ -0,0 +1,125 @@
+# --- 跨 session 共用快取：single-flight + stale-while-revalidate + 依盤別設定 TTL ---
+# 同一個 key 同時只會有一個上游請求，其他請求等同一個結果；
+# 過期的資料先回傳，背景再更新，避免快取到期那一刻所有使用者一起卡住
+import contextvars
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta, time as dtime
+from zoneinfo import ZoneInfo
+from perf import note_cache, note_error, span
+
+# 盤別：(時區, 開盤, 收盤)
+SESSIONS = {
+    "TW": (ZoneInfo("Asia/Taipei"), dtime(9, 0), dtime(13, 30)),
+    "US": (ZoneInfo("America/New_York"), dtime(9, 30), dtime(16, 0)),
+}
+SETTLE = timedelta(hours=1)  # 收盤後一小時內報價仍可能修正
+
+
+def market_of(symbol):
+    symbol = symbol.upper()
+    return "TW" if symbol.endswith((".TW", ".TWO")) or symbol == "^TWII" else "US"
+
+
+def market_ttl(market, intraday=60, settling=300, now=None):
+    # 盤中短 TTL；收盤後結算期用中等 TTL；之後一路快取到下一次開盤
+    tz, open_, close = SESSIONS[market]
+    now = (now or datetime.now(tz)).astimezone(tz)
+    today_open = datetime.combine(now.date(), open_, tz)
+    today_close = datetime.combine(now.date(), close, tz)
+    if now.weekday() < 5:
+        if today_open <= now < today_close: return intraday
+        if today_close <= now < today_close + SETTLE: return settling
+        if now < today_open: return max((today_open - now).total_seconds(), intraday)
+    next_open = today_open + timedelta(days=1)
+    while next_open.weekday() >= 5: next_open += timedelta(days=1)
+    return max((next_open - now).total_seconds(), intraday)
+
+
+def last_settled(market, now=None):
+    # 最近一次已過去的「收盤 + SETTLE」時間點 (epoch 秒)；在這之前同步的 K 棒可能還是盤中的半成品
+    tz, _, close = SESSIONS[market]
+    now = (now or datetime.now(tz)).astimezone(tz)
+    day = now.date()
+    while True:
+        settled = datetime.combine(day, close, tz) + SETTLE
+        if day.weekday() < 5 and settled <= now: return settled.timestamp()
+        day -= timedelta(days=1)
+
+
+def bars_stale(market, fetched_at, max_age, now=None):
+    # 本地 K 棒是否要向上游補抓：盤中 / 結算期超過 max_age 秒就補；
+    # 收盤結算後只要最後同步早於結算點就補一次，之後到下次開盤都是最終值
+    # (不能用 market_ttl：那是「從現在起還能快取多久」，不是「多久以前抓的算舊」)
+    tz, open_, close = SESSIONS[market]
+    now = (now or datetime.now(tz)).astimezone(tz)
+    if fetched_at < last_settled(market, now): return True
+    today_open = datetime.combine(now.date(), open_, tz)
+    trading = now.weekday() < 5 and today_open <= now < datetime.combine(now.date(), close, tz) + SETTLE
+    return trading and now.timestamp() - fetched_at > max_age
+
+
+class SWRCache:
+    def __init__(self, max_entries=512, max_workers=4, retry_after=30):
+        self.max_entries = max_entries
+        self.retry_after = retry_after  # 背景更新失敗時，舊資料延長的秒數
+        self.stats = {"hit": 0, "stale": 0, "miss": 0, "coalesced": 0, "errors": 0}
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._inflight = {}  # key -> Future
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="swr-refresh")
+
+    def get(self, key, loader, ttl, allow_stale=True):
+        # ttl：秒數，或回傳秒數的函式 (載入完成時才計算，依當下盤別)
+        # allow_stale=False：過期時不回舊值，同步等新資料 (背景排程建快照用)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None: self._entries.move_to_end(key)
+            if entry is not None and entry[1] > now:
+                self.stats["hit"] += 1
+                note_cache("hit")
+                return entry[0]
+            future = self._inflight.get(key)
+            if entry is not None and allow_stale:
+                self.stats["stale"] += 1
+                note_cache("stale")
+                if future is None:
+                    self._inflight[key] = future = Future()
+                    # 執行緒池不會帶上呼叫端的 contextvars，複製一份過去，背景更新的 span 才接得上
+                    self._pool.submit(contextvars.copy_context().run, self._refresh, key, loader, ttl, future)
+                return entry[0]
+            owner = future is None
+            if owner: self._inflight[key] = future = Future()
+            self.stats["miss" if owner else "coalesced"] += 1
+            note_cache("miss" if owner else "coalesced")
+        if owner: self._load(key, loader, ttl, future)
+        return future.result()
+
+    def _refresh(self, key, loader, ttl, future):
+        with span("refresh"): self._load(key, loader, ttl, future)
+
+    def _load(self, key, loader, ttl, future):
+        try:
+            value = loader()
+        except BaseException as e:
+            note_error(e)
+            with self._lock:
+                self.stats["errors"] += 1
+                self._inflight.pop(key, None)
+                entry = self._entries.get(key)
+                if entry is not None: self._entries[key] = (entry[0], time.time() + self.retry_after)
+            future.set_exception(e)
+            return
+        expires = time.time() + (ttl() if callable(ttl) else ttl)
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries: self._entries.popitem(last=False)
+            self._inflight.pop(key, None)
+        future.set_result(value)
+
+    def clear(self):
+        with self._lock: self._entries.clear()
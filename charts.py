@@ -0,0 +1,106 @@
+# --- K 線圖：長區間依圖寬合併 K 棒、均線 / 布林改用 WebGL 線條，圖表物件依 (代號, 週期, 最後一根) 快取 ---
+# 不依賴 Streamlit；回傳的 go.Figure 由多個使用者共用，呼叫端不可再修改
+import threading
+from collections import OrderedDict
+import numpy as np
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+from perf import note_cache, traced
+
+MAX_POINTS = 400    # 寬版頁面上每根 K 棒約 2~3 px，再多肉眼也分不出來
+MAX_FIGURES = 64
+OVERLAYS = [
+    ('SMA_5', '5MA', dict(color='orange', width=1)),
+    ('SMA_20', '月線', dict(color='blue', width=1)),
+    ('SMA_60', '季線', dict(color='green', width=1)),
+]
+BAND = dict(color='gray', width=1, dash='dot')
+
+_figures = OrderedDict()
+_lock = threading.Lock()
+
+
+def downsample(df, max_points=MAX_POINTS):
+    # 超過 max_points 根時每 k 根併成一根：開盤取首、高低取極值、量加總，收盤與指標取末根
+    n = len(df)
+    if n <= max_points: return df
+    k = -(-n // max_points)
+    first = (n - 1) % k + 1  # 第一組可能不滿 k 根，讓最新一組永遠完整
+    starts = np.r_[0, np.arange(first, n, k)]
+    ends = np.r_[starts[1:] - 1, n - 1]
+    out = df.iloc[ends].copy()
+    out['Open'] = df['Open'].values[starts]
+    out['High'] = np.maximum.reduceat(df['High'].values, starts)
+    out['Low'] = np.minimum.reduceat(df['Low'].values, starts)
+    out['Volume'] = np.add.reduceat(df['Volume'].values, starts)
+    return out
+
+
+def _x(index):
+    # 日線只送日期字串，比含時區的完整時間戳小一半
+    return np.asarray(index.strftime('%Y-%m-%d'))
+
+
+def _has(df, col):
+    return col in df and df[col].notna().iloc[-1]
+
+
+def stock_figure(df):
+    # df: 含 OHLCV 與指標欄位 (已合併過的) K 線
+    x = _x(df.index)
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, vertical_spacing=0.05, row_width=[0.2, 0.7])
+    fig.add_trace(go.Candlestick(x=x, open=df['Open'], high=df['High'], low=df['Low'], close=df['Close'], name='K線', increasing_line_color='red', decreasing_line_color='green'), row=1, col=1)
+    for col, name, line in OVERLAYS:
+        if _has(df, col): fig.add_trace(go.Scattergl(x=x, y=df[col].values, line=line, name=name), row=1, col=1)
+    if _has(df, 'BBU_20_2.0'):
+        fig.add_trace(go.Scattergl(x=x, y=df['BBU_20_2.0'].values, line=BAND, name='布林上'), row=1, col=1)
+        fig.add_trace(go.Scattergl(x=x, y=df['BBL_20_2.0'].values, line=BAND, fill='tonexty', fillcolor='rgba(200,200,200,0.1)', name='布林下'), row=1, col=1)
+    colors = np.where(df['Close'] >= df['Open'], 'red', 'green')
+    fig.add_trace(go.Bar(x=x, y=df['Volume'].values, marker_color=colors, name='量'), row=2, col=1)
+    fig.update_layout(xaxis_rangeslider_visible=False, height=450, margin=dict(l=0, r=0, t=10, b=0), showlegend=False)
+    return fig
+
+
+def index_figure(df):
+    x = _x(df.index)
+    fig = go.Figure(data=[go.Candlestick(
+        x=x, open=df['Open'], high=df['High'], low=df['Low'], close=df['Close'],
+        increasing_line_color='red', decreasing_line_color='green'
+    )])
+    fig.add_trace(go.Scattergl(x=x, y=df['SMA_20'].values, line=dict(color='blue', width=1), name='月線'))
+    fig.update_layout(xaxis_rangeslider_visible=False, height=300, margin=dict(l=0, r=0, t=10, b=0))
+    return fig
+
+
+def _cached(key, build):
+    with _lock:
+        fig = _figures.get(key)
+        if fig is not None:
+            _figures.move_to_end(key)
+            note_cache("hit")
+            return fig
+    note_cache("miss")
+    fig = build()
+    with _lock:
+        _figures[key] = fig
+        while len(_figures) > MAX_FIGURES: _figures.popitem(last=False)
+    return fig
+
+
+def _key(kind, symbol, period, df, max_points):
+    # 盤中最後一根仍在變動，收盤價一併放進 key
+    return kind, symbol.strip().upper(), period, df.index[-1], float(df['Close'].iloc[-1]), len(df), max_points
+
+
+@traced("chart")
+def stock_chart(symbol, period, df, max_points=MAX_POINTS):
+    return _cached(_key("stock", symbol, period, df, max_points), lambda: stock_figure(downsample(df, max_points)))
+
+
+@traced("chart")
+def index_chart(symbol, period, df, max_points=MAX_POINTS):
+    return _cached(_key("index", symbol, period, df, max_points), lambda: index_figure(downsample(df, max_points)))
+
+
+def clear():
+    with _lock: _figures.clear()
@@ -0,0 +1,276 @@
+# --- 行情資料存取層 (不依賴 Streamlit，可單獨匯入 / 基準測試) ---
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+import pandas as pd
+import requests
+import yfinance as yf
+from cache import SESSIONS, SWRCache, bars_stale, market_of, market_ttl
+from perf import note_error, traced
+
+STORE_PATH = os.environ.get("SHORT_BAR_STORE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "bars.sqlite"))
+PERIOD_OFFSETS = {
+    "5d": pd.DateOffset(days=5), "1mo": pd.DateOffset(months=1), "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6), "1y": pd.DateOffset(years=1), "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5), "10y": pd.DateOffset(years=10),
+}
+BAR_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+LIVE_MAX_AGE = 60  # 單檔查詢：盤中 / 結算期 K 棒最多沿用幾秒
+# Yahoo 奇摩股市 API 根網址；可指向本地替身伺服器 (bench/standin.py) 做離線測試
+TW_API = os.environ.get("SHORT_TW_API", "https://tw.stock.yahoo.com/_td-stock/api/resource")
+SECTOR_RANK_URL = TW_API + "/StockServices.rank;exchange=TAI;limit=10;period=day;rankType=industry"
+SECTOR_HEADERS = {"Referer": "https://tw.stock.yahoo.com/class/industry"}
+
+
+
+# 上游沒有回資料 (yfinance 查無代號或被擋時回空表而不丟例外)；
+# 載入函式改丟這個例外，快取就不會把失敗當成功記住 market_ttl 那麼久
+class NoDataError(LookupError):
+    pass
+
+
+# keep-alive 連線池，所有 HTTP 查詢共用
+session = requests.Session()
+session.headers.update({"User-Agent": "Mozilla/5.0"})
+session.mount("https://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+
+# V2.7 美股指數：單次多檔下載 (yfinance 內部以執行緒並行)，取代逐檔 history 串行抓取
+def fetch_index_quotes(tickers, period="5d"):
+    quotes = {t: None for t in tickers}
+    df = yf.download(list(tickers), period=period, group_by="ticker", threads=True, progress=False)
+    for t in tickers:
+        try:
+            # 各指數交易日不同 (如 VIX)，先去掉空值再取最後兩根；單檔失敗只影響該檔
+            close = df[t]['Close'].dropna()
+            if len(close) >= 2: quotes[t] = (float(close.iloc[-1]), float(close.iloc[-2]))
+        except Exception as e: note_error(e)
+    if all(q is None for q in quotes.values()): raise NoDataError(f"查無指數報價: {', '.join(tickers)}")
+    return quotes
+
+
+def fetch_tw_hot_sectors():
+    r = session.get(SECTOR_RANK_URL, headers=SECTOR_HEADERS, verify=False, timeout=5)
+    r.raise_for_status()
+    sector_data, sector_ids = [], []
+    for item in r.json().get('list', []):
+        sector_data.append({"族群名稱": item.get('symbolName', ''), "漲跌幅": float(item.get('changePercent', 0))})
+        sector_ids.append(item.get('sectorId'))
+    if not sector_data: raise NoDataError("查無族群排行")
+    # 索引為族群代號 (頁面隱藏索引)，族群廣度據此抓成分股，不必再打一次排行
+    return pd.DataFrame(sector_data, index=pd.Index(sector_ids, name="sectorId"))
+
+
+def _period_start(period):
+    return pd.Timestamp.now(tz="UTC").normalize() - PERIOD_OFFSETS[period]
+
+
+def _to_epoch(index):
+    return (index.tz_convert("UTC") - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1)
+
+
+# V2.7 本地 K 線庫：依 (代號, 週期) 存 SQLite，只向上游補抓最後一根之後的資料
+class BarStore:
+    def __init__(self, path=STORE_PATH, max_age=900):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.max_age = max_age  # 盤中 / 結算期幾秒內抓過就直接讀本地，不碰上游 (見 cache.bars_stale)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS bars (
+            symbol TEXT, interval TEXT, ts INTEGER, open REAL, high REAL, low REAL, close REAL, volume REAL,
+            PRIMARY KEY (symbol, interval, ts)) WITHOUT ROWID""")
+        # since = 已完整覆蓋的起始時間；fetched_at = 最後一次向上游同步的時間
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS meta (
+            symbol TEXT, interval TEXT, tz TEXT, since INTEGER, fetched_at REAL,
+            PRIMARY KEY (symbol, interval))""")
+        self.conn.commit()
+
+    def _meta(self, symbol, interval):
+        with self.lock:
+            return self.conn.execute("SELECT tz, since, fetched_at FROM meta WHERE symbol=? AND interval=?",
+                                     (symbol, interval)).fetchone()
+
+    def _anchor(self, symbol, interval):
+        # 倒數第二根 (已收完) K 棒的 (ts, 收盤)：增量從這根開始補抓，重疊的這根用來檢查上游是否回溯調整
+        with self.lock:
+            rows = self.conn.execute("SELECT ts, close FROM bars WHERE symbol=? AND interval=? ORDER BY ts DESC LIMIT 2",
+                                     (symbol, interval)).fetchall()
+        return rows[-1]
+
+    @staticmethod
+    def _adjusted(df, anchor):
+        # 除權息 / 分割後 Yahoo 會回溯調整整段價格；重疊那根收盤對不上，本地舊 K 棒就不能再接
+        if df.empty: return False
+        close = df["Close"].to_numpy(float)[_to_epoch(df.index).to_numpy() == anchor[0]]
+        return len(close) > 0 and not np.isclose(close[0], anchor[1], rtol=1e-6)
+
+    def _delete(self, symbol, interval):
+        with self.lock:
+            self.conn.execute("DELETE FROM bars WHERE symbol=? AND interval=?", (symbol, interval))
+            self.conn.execute("DELETE FROM meta WHERE symbol=? AND interval=?", (symbol, interval))
+            self.conn.commit()
+
+    def _write(self, symbol, interval, df, since=None):
+        rows = []
+        if not df.empty:
+            ts = _to_epoch(df.index)
+            rows = list(zip([symbol] * len(df), [interval] * len(df), ts.tolist(),
+                            *(df[c].astype(float).tolist() for c in BAR_COLUMNS)))
+        tz = str(df.index.tz) if not df.empty else "UTC"
+        with self.lock:
+            self.conn.executemany("INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            if since is None:
+                self.conn.execute("UPDATE meta SET fetched_at=? WHERE symbol=? AND interval=?", (time.time(), symbol, interval))
+            else:
+                self.conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?, ?, ?, ?)", (symbol, interval, tz, since, time.time()))
+            self.conn.commit()
+
+    def _read(self, symbol, interval, start_ts, tz):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT ts, open, high, low, close, volume FROM bars WHERE symbol=? AND interval=? AND ts>=? ORDER BY ts",
+                (symbol, interval, start_ts)).fetchall()
+        df = pd.DataFrame(rows, columns=["ts"] + BAR_COLUMNS)
+        df.index = pd.DatetimeIndex(pd.to_datetime(df.pop("ts"), unit="s", utc=True).dt.tz_convert(tz), name="Date")
+        return df
+
+    def history(self, symbol, period="6mo", interval="1d", max_age=None):
+        symbol = symbol.strip().upper()
+        max_age = self.max_age if max_age is None else max_age
+        start = _period_start(period)
+        start_ts = int(start.timestamp())
+        meta = self._meta(symbol, interval)
+        if meta is None or meta[1] > start_ts:
+            # 沒存過或本地範圍不夠長：整段抓一次
+            df = yf.Ticker(symbol).history(period=period, interval=interval)
+            if df.empty: return df
+            self._write(symbol, interval, df[BAR_COLUMNS], since=start_ts)
+            tz = str(df.index.tz)
+        else:
+            tz = meta[0]
+            if bars_stale(market_of(symbol), meta[2], max_age):
+                # 增量：從倒數第二根開始補抓並覆寫 (最後一根可能是盤中未收完的 K 棒)
+                anchor = self._anchor(symbol, interval)
+                since = pd.Timestamp(anchor[0], unit="s", tz="UTC").tz_convert(tz)
+                try:
+                    df = yf.Ticker(symbol).history(start=since.strftime("%Y-%m-%d"), interval=interval)
+                    if self._adjusted(df, anchor):
+                        # 價格已回溯調整：整段重抓，不把調整後的新 K 棒接在未調整的舊資料後面
+                        self._delete(symbol, interval)
+                        df = yf.Ticker(symbol).history(period=period, interval=interval)
+                        if not df.empty: self._write(symbol, interval, df[BAR_COLUMNS], since=start_ts)
+                    # 至少該回重疊的那幾根；空表視同失敗，不更新 fetched_at，下次再補
+                    elif not df.empty: self._write(symbol, interval, df[BAR_COLUMNS])
+                except Exception as e: note_error(e)  # 上游失敗就先用本地資料
+        return self._read(symbol, interval, start_ts, tz)
+
+    def _read_many(self, symbols, interval, start_ts, chunk=500):
+        rows = []
+        with self.lock:
+            for i in range(0, len(symbols), chunk):
+                part = symbols[i:i + chunk]
+                rows += self.conn.execute(
+                    f"SELECT symbol, ts, open, high, low, close, volume FROM bars WHERE interval=? AND ts>=? "
+                    f"AND symbol IN ({','.join('?' * len(part))})", (interval, start_ts, *part)).fetchall()
+        return pd.DataFrame(rows, columns=["symbol", "ts"] + BAR_COLUMNS)
+
+    def history_panel(self, symbols, period="6mo", interval="1d", chunk=200):
+        # 多檔版本：本地夠新的直接讀，其餘依「整段 / 增量」分組後以 yf.download 批次補抓；
+        # 回傳 {欄位: (日期 × 代號) DataFrame}
+        symbols = list(dict.fromkeys(s.strip().upper() for s in symbols))
+        start_ts = int(_period_start(period).timestamp())
+        missing, stale = [], []
+        for s in symbols:
+            meta = self._meta(s, interval)
+            if meta is None or meta[1] > start_ts: missing.append(s)
+            elif bars_stale(market_of(s), meta[2], self.max_age): stale.append(s)
+        anchors = {s: self._anchor(s, interval) for s in stale}
+        since = min((a[0] for a in anchors.values()), default=None)
+        groups = [(missing, {"period": period}, start_ts)]
+        if since is not None:
+            groups.append((stale, {"start": pd.Timestamp(since, unit="s", tz="UTC").strftime("%Y-%m-%d")}, None))
+        adjusted = []  # 增量時發現價格已回溯調整的代號，最後整段重抓
+        for group, kwargs, write_since in groups:
+            for i in range(0, len(group), chunk):
+                part = group[i:i + chunk]
+                try:
+                    df = yf.download(part, interval=interval, group_by="ticker", auto_adjust=True, ignore_tz=False,
+                                     threads=True, progress=False, **kwargs)
+                except Exception as e:
+                    note_error(e)
+                    continue
+                for s in part:
+                    if s not in df.columns.get_level_values(0): continue
+                    # 轉回該市場時區再存，meta 的 tz 才會是單檔 history() 讀取時該用的時區
+                    bars = df[s][BAR_COLUMNS].dropna(how="all").tz_convert(SESSIONS[market_of(s)][0])
+                    if group is stale and self._adjusted(bars, anchors[s]):
+                        self._delete(s, interval)
+                        adjusted.append(s)
+                    elif not bars.empty: self._write(s, interval, bars, since=write_since)
+            if group is stale and adjusted: groups.append((adjusted, {"period": period}, start_ts))
+        long = self._read_many(symbols, interval, start_ts)
+        if long.empty: return {k: pd.DataFrame() for k in BAR_COLUMNS}
+        when = pd.to_datetime(long.pop("ts"), unit="s", utc=True)
+        if interval.endswith(("d", "wk", "mo")):
+            # 日線以各檔所屬市場的當地交易日對齊 (不含時區)：台股 K 棒在台北 0 時、美股在紐約 0 時，
+            # 直接用 epoch 當索引會讓同一天變成交錯的兩列，缺值補齊後改變指標。
+            # 時區依市場決定：多檔混合下載時 yfinance 回傳的索引已轉成 UTC，meta 裡的 tz 不可靠
+            long["Date"] = pd.concat([when[rows].dt.tz_convert(SESSIONS[market_of(s)][0]).dt.tz_localize(None).dt.normalize()
+                                      for s, rows in long.groupby("symbol").groups.items()])
+        else:
+            long["Date"] = when.dt.tz_convert(self._meta(long["symbol"].iloc[0], interval)[0])
+        # 同一交易日若有兩根 (盤中那根時間戳不在 0 時)，留最新的
+        long = long.assign(ts=when).sort_values("ts").drop_duplicates(["symbol", "Date"], keep="last")
+        wide = long.pivot(index="Date", columns="symbol", values=BAR_COLUMNS)
+        return {k: wide[k].rename_axis(None, axis=1) for k in BAR_COLUMNS}
+
+
+# --- 跨 session 共用資料層：所有頁面 / API 都經過這裡取資料 ---
+_store = None
+_store_lock = threading.Lock()
+cache = SWRCache()
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None: _store = BarStore()
+    return _store
+
+
+def _load_history(symbol, period):
+    df = get_store().history(symbol, period, max_age=LIVE_MAX_AGE)
+    if df.empty: raise NoDataError(f"查無資料: {symbol}")
+    return df
+
+
+@traced("history")
+def get_history(symbol, period="6mo", fresh=False):
+    # fresh=True：過期就同步重抓，不回傳上一輪的舊值；查無資料回空表 (不快取)
+    symbol = symbol.strip().upper()
+    market = market_of(symbol)
+    try:
+        return cache.get(("history", symbol, period), lambda: _load_history(symbol, period),
+                         lambda: market_ttl(market), allow_stale=not fresh)
+    except NoDataError as e:
+        note_error(e)
+        return pd.DataFrame(columns=BAR_COLUMNS)
+
+
+@traced("quotes")
+def get_index_quotes(tickers, fresh=False):
+    # 上游失敗會丟出例外 (不快取)；排程因此保留上一份快照並於 retry 秒後重試
+    tickers = tuple(tickers)
+    return cache.get(("quotes", tickers), lambda: fetch_index_quotes(tickers), lambda: market_ttl("US"),
+                     allow_stale=not fresh)
+
+
+@traced("sectors")
+def get_tw_hot_sectors(fresh=False):
+    try: return cache.get(("sectors",), fetch_tw_hot_sectors, lambda: market_ttl("TW", intraday=300), allow_stale=not fresh)
+    except Exception as e:
+        note_error(e)
+        return None
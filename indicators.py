@@ -0,0 +1,267 @@
+# --- 技術指標引擎 ---
+# 一次算完 SMA5/20/60、RSI14、KD(14,3,3)、MACD(12,26,9)、布林(20,2)，寫進預先配置的陣列；
+# 欄位名稱與數值對齊 pandas_ta (0.3.x 預設參數)。輸入可為一維 (單檔) 或二維 (時間 × 多檔)。
+# IndicatorState 則是逐根 K 棒的增量版本，新增 / 更新一根只需 O(1)。
+import copy
+import sys
+from collections import deque
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from perf import traced
+
+COLUMNS = [
+    "SMA_5", "SMA_20", "SMA_60", "RSI_14", "STOCHk_14_3_3", "STOCHd_14_3_3",
+    "MACD_12_26_9", "MACDh_12_26_9", "MACDs_12_26_9",
+    "BBL_20_2.0", "BBM_20_2.0", "BBU_20_2.0", "BBB_20_2.0", "BBP_20_2.0",
+]
+EPS = sys.float_info.epsilon
+
+
+def _first_valid(x):
+    valid = ~np.isnan(x)
+    return np.where(valid.any(axis=0), valid.argmax(axis=0), len(x))
+
+
+def _mask_head(y, stop):
+    # 每一欄 stop 之前設為 NaN (暖身期)
+    y[np.arange(len(y))[:, None] < stop] = np.nan
+    return y
+
+
+def _recurse(x, decay, block=32):
+    # y[t] = decay * y[t-1] + x[t]，y[-1] = 0
+    # 切成固定長度區塊：區塊內用 cumsum 一次算完，區塊之間只傳遞一個尾值，避免逐根 Python 迴圈
+    n, nb = len(x), -(-len(x) // block)
+    xb = np.zeros((nb * block,) + x.shape[1:])
+    xb[:n] = x
+    xb = xb.reshape(nb, block, -1)
+    p = (decay ** np.arange(block, dtype=float))[:, None]
+    local = np.cumsum(xb / p, axis=1) * p
+    carry = np.empty((nb,) + local.shape[2:])
+    prev, step = 0.0, decay ** block
+    for b in range(nb):
+        carry[b] = prev
+        prev = step * prev + local[b, -1]
+    y = local + (p * decay) * carry[:, None, :]
+    return y.reshape(nb * block, -1)[:n]
+
+
+def _sma(x, n):
+    # 先減去每欄第一個有效值再累加，降低 cumsum 的捨入誤差
+    f = _first_valid(x)
+    base = np.nan_to_num(x[np.minimum(f, len(x) - 1), np.arange(x.shape[1])])
+    c = np.cumsum(np.nan_to_num(x - base), axis=0)
+    y = np.empty_like(x)
+    y[:n] = c[:n] / n
+    y[n:] = (c[n:] - c[:-n]) / n if len(x) > n else y[n:]
+    return _mask_head(y + base, f + n - 1)
+
+
+def _rolling(x, n, fn):
+    y = np.full_like(x, np.nan)
+    if len(x) >= n: y[n - 1:] = fn(sliding_window_view(x, n, axis=0), axis=-1)
+    return y
+
+
+def _ema(x, n):
+    # pandas_ta ema：前 n 根的 SMA 當種子，之後 ewm(span=n, adjust=False)
+    f = _first_valid(x)
+    start = f + n - 1
+    alpha = 2 / (n + 1)
+    z = alpha * np.nan_to_num(x)
+    rows = np.arange(len(x))[:, None]
+    z[rows < start] = 0
+    cols = np.flatnonzero(start < len(x))
+    if len(cols):
+        seed = _sma(x, n)[start[cols], cols]
+        z[start[cols], cols] = seed
+    return _mask_head(_recurse(z, 1 - alpha), start)
+
+
+def _rma(x, n):
+    # pandas_ta rma：ewm(alpha=1/n, adjust=True, min_periods=n)
+    f = _first_valid(x)
+    decay = 1 - 1 / n
+    num = _recurse(np.nan_to_num(x), decay)
+    den = _recurse((~np.isnan(x)).astype(float), decay)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return _mask_head(num / den, f + n - 1)
+
+
+def _non_zero_range(a, b):
+    d = a - b
+    return d + EPS * (d == 0).any(axis=0)
+
+
+def compute(df, out=None):
+    h, l, c = (np.asarray(df[k], dtype=float) for k in ("High", "Low", "Close"))
+    squeeze = c.ndim == 1
+    h, l, c = (a.reshape(len(a), -1) for a in (h, l, c))
+    if out is None: out = np.empty((len(c), len(COLUMNS), c.shape[1]))
+    col = dict(zip(COLUMNS, out.transpose(1, 0, 2)))
+    col["SMA_5"][:], col["SMA_20"][:], col["SMA_60"][:] = _sma(c, 5), _sma(c, 20), _sma(c, 60)
+
+    delta = np.full_like(c, np.nan)
+    delta[1:] = c[1:] - c[:-1]
+    gap = np.isnan(delta)
+    pos, neg = np.where(delta > 0, delta, 0.0), np.where(delta < 0, delta, 0.0)
+    pos[gap] = neg[gap] = np.nan
+    pos_avg, neg_avg = _rma(pos, 14), _rma(neg, 14)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        col["RSI_14"][:] = 100 * pos_avg / (pos_avg + np.abs(neg_avg))
+        lowest, highest = _rolling(l, 14, np.min), _rolling(h, 14, np.max)
+        stoch = 100 * (c - lowest) / _non_zero_range(highest, lowest)
+    col["STOCHk_14_3_3"][:] = k = _sma(stoch, 3)
+    col["STOCHd_14_3_3"][:] = _sma(k, 3)
+
+    macd = _ema(c, 12) - _ema(c, 26)
+    signal = _ema(macd, 9)
+    col["MACD_12_26_9"][:], col["MACDh_12_26_9"][:], col["MACDs_12_26_9"][:] = macd, macd - signal, signal
+
+    mid = col["SMA_20"]
+    std = np.sqrt(_rolling(c, 20, np.var))
+    lower, upper = mid - 2 * std, mid + 2 * std
+    ulr = _non_zero_range(upper, lower)
+    col["BBL_20_2.0"][:], col["BBM_20_2.0"][:], col["BBU_20_2.0"][:] = lower, mid, upper
+    col["BBB_20_2.0"][:] = 100 * ulr / mid
+    col["BBP_20_2.0"][:] = _non_zero_range(c, lower) / ulr
+    return out[:, :, 0] if squeeze else out
+
+
+def compact(block):
+    # block: {欄位: (日期 × 代號) ndarray}；每一欄只留有成交的 K 棒並靠底對齊 (前面補 NaN，如同較晚上市)。
+    # 停牌不補假 K 棒，指標暖身 / 回測持有天數都以該檔自己的交易日計 (全市場掃描與回測共用)
+    traded = np.isfinite(block["Close"])
+    order = np.argsort(traded, axis=0, kind="stable")
+    head = np.arange(len(traded))[:, None] < (~traded).sum(axis=0)
+    out = {}
+    for k, v in block.items():
+        v = np.take_along_axis(v, order, axis=0)
+        v[head] = np.nan
+        out[k] = v
+    return out
+
+
+@traced("indicators")
+def add_indicators(df):
+    block = pd.DataFrame(compute(df), index=df.index, columns=COLUMNS)
+    return pd.concat([df, block], axis=1)
+
+
+# --- 增量版：維持滾動狀態，每新增一根 K 棒 O(1) 更新 ---
+class _Ema:
+    def __init__(self, n):
+        self.n, self.alpha, self.seed, self.value = n, 2 / (n + 1), [], None
+
+    def update(self, x):
+        if self.value is None:
+            self.seed.append(x)
+            if len(self.seed) == self.n: self.value = sum(self.seed) / self.n
+        else:
+            self.value += self.alpha * (x - self.value)
+        return self.value
+
+
+class _Rma:
+    def __init__(self, n):
+        self.n, self.decay, self.num, self.den, self.count = n, 1 - 1 / n, 0.0, 0.0, 0
+
+    def update(self, x):
+        self.num = self.num * self.decay + x
+        self.den = self.den * self.decay + 1
+        self.count += 1
+        return self.num / self.den if self.count >= self.n else None
+
+
+class _Sma:
+    def __init__(self, n):
+        self.window, self.total = deque(maxlen=n), 0.0
+
+    def update(self, x):
+        if len(self.window) == self.window.maxlen: self.total -= self.window[0]
+        self.window.append(x)
+        self.total += x
+        return self.total / len(self.window) if len(self.window) == self.window.maxlen else None
+
+
+class IndicatorState:
+    def __init__(self):
+        self.sma = {5: _Sma(5), 20: _Sma(20), 60: _Sma(60)}
+        self.prev_close = None
+        self.pos, self.neg = _Rma(14), _Rma(14)
+        self.highs, self.lows = deque(maxlen=14), deque(maxlen=14)
+        self.stoch_k, self.stoch_d = _Sma(3), _Sma(3)
+        self.fast, self.slow, self.signal = _Ema(12), _Ema(26), _Ema(9)
+        self.closes = deque(maxlen=20)
+        self.volumes = deque(maxlen=5)
+        self.high_max = -np.inf
+        self.row = self.prev_row = None
+        self._saved = None
+
+    @classmethod
+    def from_frame(cls, df):
+        # 之後只有最後一根可能被 replace 覆寫，前面的 K 棒不必保存還原點 (deepcopy 佔暖身大半時間)
+        state, last = cls(), len(df) - 1
+        for i, bar in enumerate(df[["Open", "High", "Low", "Close", "Volume"]].itertuples(index=False)):
+            state.update(*bar, checkpoint=i == last)
+        return state
+
+    def volume_ratio(self):
+        # 同 analysis.volume_ratio：今日量 / 5 根均量，今日量 < 100 時用前一根
+        if len(self.volumes) < 5: return 0.0
+        vol_avg = sum(self.volumes) / 5
+        vol_today = self.volumes[-2] if self.volumes[-1] < 100 else self.volumes[-1]
+        return vol_today / vol_avg if vol_avg > 0 else 0.0
+
+    def update(self, open_, high, low, close, volume=0.0, replace=False, checkpoint=True):
+        # replace=True：更新尚未收完的最後一根 (先還原到上一根收完時的狀態再套用)
+        # checkpoint=False：這一根之後不會再被 replace，不保存還原點
+        if replace and self._saved is not None:
+            self.__dict__.update(copy.deepcopy(self._saved))
+        elif checkpoint:
+            self._saved = copy.deepcopy({k: v for k, v in self.__dict__.items() if k != "_saved"})
+        self.prev_row = self.row
+        row = dict(Open=open_, High=high, Low=low, Close=close, Volume=volume)
+        row.update(dict.fromkeys(COLUMNS, np.nan))
+        for n, sma in self.sma.items():
+            v = sma.update(close)
+            if v is not None: row[f"SMA_{n}"] = v
+
+        if self.prev_close is not None:
+            delta = close - self.prev_close
+            p, q = self.pos.update(max(delta, 0.0)), self.neg.update(min(delta, 0.0))
+            if p is not None and p - q != 0: row["RSI_14"] = 100 * p / (p - q)
+        self.prev_close = close
+
+        # 同 pandas_ta：高低區間為 0 時加上 epsilon 避免除以零
+        self.highs.append(high)
+        self.lows.append(low)
+        if len(self.highs) == 14:
+            lowest, highest = min(self.lows), max(self.highs)
+            k = self.stoch_k.update(100 * (close - lowest) / ((highest - lowest) or EPS))
+            if k is not None:
+                row["STOCHk_14_3_3"] = k
+                d = self.stoch_d.update(k)
+                if d is not None: row["STOCHd_14_3_3"] = d
+
+        fast, slow = self.fast.update(close), self.slow.update(close)
+        if slow is not None:
+            macd = fast - slow
+            signal = self.signal.update(macd)
+            row["MACD_12_26_9"] = macd
+            if signal is not None:
+                row["MACDs_12_26_9"], row["MACDh_12_26_9"] = signal, macd - signal
+
+        self.closes.append(close)
+        if len(self.closes) == 20:
+            window = np.fromiter(self.closes, float, 20)
+            mid, std = window.mean(), window.std()
+            lower, upper = mid - 2 * std, mid + 2 * std
+            ulr = (upper - lower) or EPS
+            row.update({"BBL_20_2.0": lower, "BBM_20_2.0": mid, "BBU_20_2.0": upper,
+                        "BBB_20_2.0": 100 * ulr / mid, "BBP_20_2.0": ((close - lower) or EPS) / ulr})
+        self.volumes.append(volume)
+        self.high_max = max(self.high_max, high)
+        self.row = row
+        return row
@@ -0,0 +1,63 @@
+# --- 盤中即時模式：1 分 / 5 分 K 增量更新指標與診斷 ---
+# 開始時用近幾日的分 K 建立滾動狀態 (一次 O(n))，之後每次輪詢只套用新進 K 棒，每根 O(1)。
+# Feed 可換成 ReplayFeed 重播錄製好的 K 線，離線驗證
+import yfinance as yf
+from analysis import diagnose_rows
+from indicators import IndicatorState
+
+SEED_PERIOD = {"1m": "5d", "5m": "1mo"}
+
+
+class YahooFeed:
+    def __init__(self, symbol, interval="1m"):
+        self.symbol, self.interval = symbol.strip().upper(), interval
+
+    def history(self):
+        return yf.Ticker(self.symbol).history(period=SEED_PERIOD[self.interval], interval=self.interval)
+
+    def bars_since(self, ts):
+        # 包含 ts 那一根 (盤中可能還在變動)
+        df = yf.Ticker(self.symbol).history(start=ts, interval=self.interval)
+        return df[df.index >= ts]
+
+
+class ReplayFeed:
+    # 重播錄製的 K 線：先放出 warmup 列當歷史，之後每次輪詢再多放 step 列。
+    # 同一時間戳可以出現多列，代表盤中同一根 K 棒的逐次更新；上游只看得到已放出的最新那一列
+    def __init__(self, bars, warmup, step=1):
+        self.bars, self.cursor, self.step = bars, warmup, step
+
+    def _visible(self):
+        visible = self.bars.iloc[:self.cursor]
+        return visible[~visible.index.duplicated(keep="last")]
+
+    def history(self):
+        return self._visible()
+
+    def bars_since(self, ts):
+        self.cursor = min(self.cursor + self.step, len(self.bars))
+        visible = self._visible()
+        return visible[visible.index >= ts]
+
+
+class LiveSession:
+    def __init__(self, feed):
+        self.feed = feed
+        history = feed.history()
+        if len(history) < 2: raise LookupError("查無分 K 資料")
+        self.state = IndicatorState.from_frame(history)
+        self.last_ts = history.index[-1]
+
+    def poll(self):
+        bars = self.feed.bars_since(self.last_ts)
+        for ts, bar in zip(bars.index, bars[["Open", "High", "Low", "Close", "Volume"]].itertuples(index=False)):
+            if ts < self.last_ts: continue
+            self.state.update(*bar, replace=ts == self.last_ts)
+            self.last_ts = ts
+        return len(bars)
+
+    def report(self):
+        state = self.state
+        report = diagnose_rows(state.row, state.prev_row, state.high_max, state.volume_ratio())
+        report["as_of"] = self.last_ts.isoformat()
+        return report
@@ -0,0 +1,119 @@
+# --- 台股代號 → 中文名稱目錄 ---
+# 上市/上櫃清單整批下載存成本地 JSON，每個 process 載入一次並在背景定期更新；
+# 目錄查不到的代號 (ETF 新掛牌、美股...) 才走 Yahoo TW，結果放 LRU
+import json
+import os
+import threading
+import time
+from functools import lru_cache
+import urllib3
+from data import TW_API, NoDataError, session
+from perf import note_cache, note_error, span, traced
+
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+NAMES_PATH = os.environ.get("SHORT_NAMES_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "names.json"))
+REFRESH_INTERVAL = 24 * 3600
+RETRY_INTERVAL = 300  # 上游失敗 (含回空清單) 時幾秒後重試
+# (網址, 代號欄位, 名稱欄位, 後綴)
+BULK_SOURCES = [
+    ("https://openapi.twse.com.tw/v1/exchangeReport/STOCK_DAY_ALL", "Code", "Name", ".TW"),
+    ("https://www.tpex.org.tw/openapi/v1/tpex_mainboard_daily_close_quotes", "SecuritiesCompanyCode", "CompanyName", ".TWO"),
+]
+AUTOCOMPLETE_URL = TW_API + "/AutocompleteService;query={}"
+STOCK_ID_URL = TW_API + "/StockServices.stockId;stockId={}"
+
+@lru_cache(maxsize=2048)
+def _remote_name(stock_id):
+    try:
+        r = session.get(AUTOCOMPLETE_URL.format(stock_id), verify=False, timeout=3)
+        for result in r.json().get('result', []):
+            if result.get('symbol') in (f"{stock_id}.TW", f"{stock_id}.TWO"):
+                return result.get('name')
+    except Exception as e: note_error(e)
+    # 第二段失敗直接拋出，不寫入 LRU，下次再試
+    r = session.get(STOCK_ID_URL.format(stock_id), verify=False, timeout=3)
+    return r.json().get('symbolName')
+
+
+class NameDirectory:
+    def __init__(self, path=NAMES_PATH, refresh_interval=REFRESH_INTERVAL):
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self.names = {}  # "2330.TW" -> "台積電"
+        self.updated = 0
+        self._thread = None
+        try:
+            with open(path, encoding="utf-8") as f:
+                saved = json.load(f)
+            self.names, self.updated = saved["names"], saved["updated"]
+        except (OSError, ValueError, KeyError): pass
+
+    def warm(self):
+        names = {}
+        for url, code_key, name_key, suffix in BULK_SOURCES:
+            r = session.get(url, timeout=10)
+            r.raise_for_status()
+            for row in r.json():
+                code, name = str(row.get(code_key, '')).strip(), str(row.get(name_key, '')).strip()
+                if code and name: names[code + suffix] = name
+        # 空清單或欄位改名都視為失敗：不回傳 (否則更新時間沒動，背景迴圈會不停重抓)
+        if not names: raise NoDataError("上市櫃名稱清單沒有可用資料")
+        # 整份換掉 (dict 指派為原子操作)，讀取端不需上鎖
+        self.names, self.updated = names, time.time()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"updated": self.updated, "names": names}, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def _refresh_loop(self):
+        while True:
+            wait = self.updated + self.refresh_interval - time.time()
+            if wait > 0: time.sleep(wait)
+            failed = False
+            with span("name_refresh"):
+                try: self.warm()
+                except Exception as e:
+                    note_error(e)
+                    failed = True
+            if failed: time.sleep(RETRY_INTERVAL)
+
+    def start_refresh(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._refresh_loop, name="name-directory-refresh", daemon=True)
+            self._thread.start()
+
+    def symbols(self):
+        return list(self.names)
+
+    def lookup(self, ticker):
+        key = ticker.strip().upper()
+        stock_id = key.split('.')[0]
+        name = self.names.get(key) or self.names.get(stock_id + ".TW") or self.names.get(stock_id + ".TWO")
+        if name:
+            note_cache("hit")
+            return name
+        note_cache("miss")  # 目錄查不到才走 Yahoo TW (可能命中 LRU，仍算目錄未命中)
+        try: return _remote_name(stock_id) or ticker
+        except Exception as e:
+            note_error(e)
+            return ticker
+
+
+_directory = None
+_directory_lock = threading.Lock()
+
+
+def get_directory():
+    global _directory
+    with _directory_lock:
+        if _directory is None:
+            _directory = NameDirectory()
+            _directory.start_refresh()
+    return _directory
+
+
+@traced("name")
+def get_stock_name(ticker):
+    return get_directory().lookup(ticker)
@@ -0,0 +1,147 @@
+# --- 效能追蹤：各階段 span 記錄耗時 / 快取命中 / 上游錯誤次數 ---
+# 用法：with span("history"): ... 或 @traced("history")；span 內呼叫 note_cache / note_error 記到最內層 span
+# 匯出：recorder.summary() (除錯面板)、recorder.jsonl()、recorder.prometheus() (api.py /metrics)；
+# 設定 SHORT_TRACE_PATH 時每個 span 另外追加一行 JSON 到該檔
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+import numpy as np
+
+TRACE_PATH = os.environ.get("SHORT_TRACE_PATH")
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+RECENT = 5000  # 保留最近幾筆 span 供分位數與 JSONL 匯出
+
+_current = contextvars.ContextVar("perf_span", default=None)
+
+
+class Span:
+    __slots__ = ("name", "parent", "cache", "errors", "error", "last")
+
+    def __init__(self, name, parent):
+        self.name, self.parent = name, parent
+        self.cache = {}  # 快取結果 -> 次數 (hit / stale / miss / coalesced)
+        self.errors = 0
+        self.error = None
+        self.last = None  # 最近記過的例外，同一個例外一路往外傳時只算一次
+
+
+class Recorder:
+    def __init__(self, recent=RECENT, path=TRACE_PATH):
+        self.path = path
+        self._recent = deque(maxlen=recent)
+        self._stages = {}  # 階段 -> 累計量 (Prometheus 用，不受 recent 上限影響)
+        self._lock = threading.Lock()
+
+    def add(self, record):
+        with self._lock:
+            self._recent.append(record)
+            stage = self._stages.setdefault(record["stage"], {"count": 0, "sum": 0.0, "buckets": [0] * len(BUCKETS), "errors": 0, "cache": {}})
+            seconds = record["ms"] / 1000
+            stage["count"] += 1
+            stage["sum"] += seconds
+            for i, le in enumerate(BUCKETS):
+                if seconds <= le: stage["buckets"][i] += 1
+            stage["errors"] += record["errors"]
+            for outcome, n in record["cache"].items(): stage["cache"][outcome] = stage["cache"].get(outcome, 0) + n
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f: f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def records(self):
+        with self._lock: return list(self._recent)
+
+    def summary(self):
+        # 每階段一列：次數、p50 / p99 (最近 RECENT 筆)、快取命中、錯誤
+        by_stage = {}
+        for r in self.records(): by_stage.setdefault(r["stage"], []).append(r["ms"])
+        with self._lock: stages = {k: dict(v, cache=dict(v["cache"])) for k, v in self._stages.items()}
+        rows = []
+        for name, stage in stages.items():
+            ms = np.array(by_stage.get(name, [np.nan]))
+            cache = stage["cache"]
+            rows.append({
+                "stage": name, "count": stage["count"],
+                "p50_ms": round(float(np.nanpercentile(ms, 50)), 2) if np.isfinite(ms).any() else None,
+                "p99_ms": round(float(np.nanpercentile(ms, 99)), 2) if np.isfinite(ms).any() else None,
+                "hit": cache.get("hit", 0) + cache.get("stale", 0), "miss": cache.get("miss", 0) + cache.get("coalesced", 0),
+                "errors": stage["errors"],
+            })
+        return sorted(rows, key=lambda r: r["stage"])
+
+    def jsonl(self):
+        return "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in self.records())
+
+    def prometheus(self):
+        with self._lock: stages = {k: dict(v, cache=dict(v["cache"])) for k, v in self._stages.items()}
+        lines = ["# HELP short_stage_duration_seconds Time spent per dashboard stage.",
+                 "# TYPE short_stage_duration_seconds histogram"]
+        for name, s in sorted(stages.items()):
+            for le, n in zip(BUCKETS, s["buckets"]):
+                lines.append(f'short_stage_duration_seconds_bucket{{stage="{name}",le="{le}"}} {n}')
+            lines.append(f'short_stage_duration_seconds_bucket{{stage="{name}",le="+Inf"}} {s["count"]}')
+            lines.append(f'short_stage_duration_seconds_sum{{stage="{name}"}} {s["sum"]:.6f}')
+            lines.append(f'short_stage_duration_seconds_count{{stage="{name}"}} {s["count"]}')
+        lines += ["# HELP short_stage_cache_total Cache lookups per stage and outcome.", "# TYPE short_stage_cache_total counter"]
+        for name, s in sorted(stages.items()):
+            for outcome, n in sorted(s["cache"].items()):
+                lines.append(f'short_stage_cache_total{{stage="{name}",result="{outcome}"}} {n}')
+        lines += ["# HELP short_stage_errors_total Upstream or processing errors per stage.", "# TYPE short_stage_errors_total counter"]
+        for name, s in sorted(stages.items()):
+            lines.append(f'short_stage_errors_total{{stage="{name}"}} {s["errors"]}')
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        with self._lock:
+            self._recent.clear()
+            self._stages.clear()
+
+
+recorder = Recorder()
+
+
+def record(name, seconds, parent=None, cache=None, errors=0, error=None):
+    recorder.add({"ts": round(time.time(), 3), "stage": name, "parent": parent, "ms": round(seconds * 1000, 3),
+                  "cache": cache or {}, "errors": errors, "error": error, "thread": threading.current_thread().name})
+
+
+@contextmanager
+def span(name):
+    parent = _current.get()
+    s = Span(name, parent.name if parent else None)
+    token = _current.set(s)
+    start = time.perf_counter()
+    try:
+        yield s
+    except Exception as e:
+        note_error(e)
+        raise
+    finally:
+        _current.reset(token)
+        record(name, time.perf_counter() - start, s.parent, s.cache, s.errors, s.error)
+
+
+def traced(name):
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name): return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def note_cache(outcome):
+    s = _current.get()
+    if s is not None: s.cache[outcome] = s.cache.get(outcome, 0) + 1
+
+
+def note_error(exc=None):
+    # 吞掉的上游錯誤也要記一筆，才看得出是哪個階段在失敗
+    s = _current.get()
+    if s is None or (exc is not None and exc is s.last): return
+    s.last = exc
+    s.errors += 1
+    if exc is not None and s.error is None: s.error = f"{type(exc).__name__}: {exc}"
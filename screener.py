@@ -0,0 +1,53 @@
+# --- 全市場掃描：批次抓資料，多檔同時計算趨勢分 / 策略 / 支撐壓力 / 量能比 ---
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from analysis import STRATEGY_NAMES, strategy_bucket, support_resistance, trend_score, volume_ratio
+from cache import market_of
+from indicators import COLUMNS, compact, compute
+from perf import traced
+
+
+def by_market(symbols):
+    # 各市場的交易日 (假日) 不同，分開組矩陣；混在一起時對方的交易日會在這邊補出假 K 棒
+    groups = {}
+    for s in symbols: groups.setdefault(market_of(s), []).append(s)
+    return list(groups.values())
+
+
+def _score_block(block):
+    # block: 同一批代號的 (日期 × 代號) 矩陣，整批向量化計算；停牌缺值不補，每檔只算自己有成交的 K 棒
+    codes = block["Close"].columns
+    block = compact({k: v.values.astype(float) for k, v in block.items()})
+    ind = dict(zip(COLUMNS, compute({k: block[k] for k in ("High", "Low", "Close")}).transpose(1, 0, 2)))
+    close, prev_close = block["Close"][-1], block["Close"][-2]
+    latest = {k: v[-1] for k, v in ind.items()}
+    score = trend_score(close, latest["SMA_5"], latest["SMA_20"], ind["SMA_20"][-2], latest["SMA_60"], latest["MACDh_12_26_9"])
+    bucket = strategy_bucket(score, close, latest["SMA_20"], latest["SMA_60"])
+    sup_p, sup_n, res_p, res_n = support_resistance(close, latest["SMA_20"], latest["SMA_60"], latest["BBU_20_2.0"],
+                                                    latest["BBL_20_2.0"], np.nanmax(block["High"], axis=0))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pct = np.round((close - prev_close) / prev_close * 100, 2)
+    return pd.DataFrame({
+        "收盤": close, "漲跌幅": pct, "趨勢分": score, "策略": [STRATEGY_NAMES[b] for b in bucket],
+        "支撐": sup_p, "支撐位": sup_n, "壓力": res_p, "壓力位": res_n,
+        "量能比": np.round(volume_ratio(block["Volume"]), 2),
+    }, index=codes)
+
+
+@traced("scan")
+def scan(symbols, store, period="6mo", max_workers=None, chunk=250):
+    blocks = []
+    for group in by_market(symbols):
+        wide = store.history_panel(group, period)
+        if len(wide["Close"]) < 2: continue
+        codes = list(wide["Close"].columns)
+        blocks += [{k: v[codes[i:i + chunk]] for k, v in wide.items()} for i in range(0, len(codes), chunk)]
+    if not blocks: return pd.DataFrame()
+    # NumPy 大陣列運算會釋放 GIL，分批丟給執行緒即可吃滿多核
+    with ThreadPoolExecutor(max_workers or os.cpu_count()) as pool:
+        result = pd.concat(pool.map(_score_block, blocks))
+    result = result[result["收盤"].notna()]
+    result.index.name = "代號"
+    return result.sort_values(["趨勢分", "量能比"], ascending=False)
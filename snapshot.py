@@ -0,0 +1,128 @@
+# --- 市場大盤戰情：背景排程預先算好整頁快照，頁面只負責讀取與顯示 ---
+# 排程依盤別：開盤前 15 分、盤中每 interval 秒、收盤後 10 分與 60 分 (結算後) 各一次
+import threading
+import time
+from datetime import datetime, timedelta
+from analysis import calculate_change, twii_summary, us_comment
+from breadth import get_sector_breadth
+from cache import SESSIONS
+from charts import index_chart
+from data import get_history, get_index_quotes, get_tw_hot_sectors
+from indicators import add_indicators
+from perf import note_error, traced
+
+US_INDICES = {'道瓊': '^DJI', '那斯達克': '^IXIC', '費半': '^SOX', 'VIX': '^VIX'}
+PRE_OPEN = timedelta(minutes=15)
+POST_CLOSE = (timedelta(minutes=10), timedelta(minutes=60))
+
+
+def build_us():
+    quotes = get_index_quotes(tuple(US_INDICES.values()), fresh=True)
+    metrics, changes = [], {}
+    for name, ticker in US_INDICES.items():
+        quote = quotes.get(ticker)
+        if quote:
+            latest, prev_close = quote
+            changes[name] = chg = calculate_change(latest, prev_close)
+            metrics.append({"name": name, "value": latest, "change": chg, "color": "inverse" if name == 'VIX' else "normal"})
+        else: metrics.append({"name": name, "value": None})
+    level, comment = us_comment(changes.get('費半', 0), changes.get('VIX', 0))
+    return {"metrics": metrics, "level": level, "comment": comment}
+
+
+def build_tw():
+    twii = get_history("^TWII", "6mo", fresh=True)
+    if len(twii) < 2: return None
+    twii = add_indicators(twii)
+    return {"summary": twii_summary(twii), "fig": index_chart("^TWII", "6mo", twii)}
+
+
+# 排程時間點本身就是「該更新了」，一律同步取新資料；若讀快取舊值會發布上一輪的行情
+# 美股報價抓不到時 build_us 丟出例外：排程保留上一份快照，retry 秒後重試
+@traced("snapshot")
+def build_snapshot():
+    snapshot = {"built_at": time.time(), "us": build_us(), "tw": None}
+    try: snapshot["tw"] = build_tw()
+    except Exception as e: note_error(e)
+    snapshot["sectors"] = get_tw_hot_sectors(fresh=True)
+    snapshot["breadth"] = get_sector_breadth(fresh=True)
+    return snapshot
+
+
+def next_run(now, interval):
+    # 各盤別下一個排程時間取最早者
+    candidates = []
+    for tz, open_, close in SESSIONS.values():
+        local = now.astimezone(tz)
+        for days in range(8):
+            day = local.date() + timedelta(days=days)
+            if day.weekday() >= 5: continue
+            opened = datetime.combine(day, open_, tz)
+            closed = datetime.combine(day, close, tz)
+            events = [opened - PRE_OPEN] + [closed + d for d in POST_CLOSE]
+            if opened <= local < closed:
+                events.append(local + timedelta(seconds=interval))
+            elif local < opened:
+                events.append(opened)
+            events = [e for e in events if e > local]
+            if events:
+                candidates.append(min(events))
+                break
+    return min(candidates)
+
+
+class SnapshotScheduler:
+    def __init__(self, builder=build_snapshot, interval=300, retry=60):
+        self.builder = builder
+        self.interval = interval
+        self.retry = retry
+        self.latest = None
+        self.version = 0
+        self.last_error = None
+        self._ready = threading.Event()
+        self._thread = None
+
+    def refresh(self):
+        try:
+            snapshot = self.builder()
+        except Exception as e:
+            self.last_error = e
+            return False
+        self.version += 1
+        snapshot["version"] = self.version
+        self.latest = snapshot  # 整份替換，讀取端不會看到半成品
+        self._ready.set()
+        return True
+
+    def _loop(self):
+        ok = self.refresh()
+        while True:
+            now = datetime.now().astimezone()
+            wait = (next_run(now, self.interval) - now).total_seconds() if ok else self.retry
+            time.sleep(max(wait, 1))
+            ok = self.refresh()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="market-snapshot", daemon=True)
+            self._thread.start()
+        return self
+
+    def get(self, timeout=None):
+        # 第一份快照還沒好時最多等 timeout 秒
+        self._ready.wait(timeout)
+        return self.latest
+
+    def age(self):
+        return None if self.latest is None else time.time() - self.latest["built_at"]
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None: _scheduler = SnapshotScheduler().start()
+    return _scheduler
@@ -0,0 +1,42 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "bench")]
+import pandas as pd
+import pytest
+import yfinance as yf
+import data
+from cache import SWRCache
+from fixtures import synthetic_history
+
+
+def recent(symbol, bars=130):
+    # 模擬 K 線平移到今天，讓 BarStore 的期間過濾照真實時間運作
+    df = synthetic_history(symbol, bars)
+    today = pd.Timestamp.now(tz=df.index.tz).normalize()
+    df.index = df.index + (today - df.index[-1].normalize())
+    return df
+
+
+@pytest.fixture
+def upstream(monkeypatch, tmp_path):
+    # 可切換的假上游：frames[symbol] 為 None 時回空表 (yfinance 查無資料時的行為)
+    frames = {}
+
+    def since(df, start):
+        return df if start is None else df[df.index >= pd.Timestamp(start, tz=df.index.tz)]
+
+    def history(self, period=None, start=None, interval="1d", **kwargs):
+        df = frames.get(self.ticker)
+        return pd.DataFrame() if df is None else since(df, start)
+
+    def download(tickers, start=None, **kwargs):
+        parts = {t: since(frames[t], start) for t in tickers if frames.get(t) is not None}
+        return pd.concat(parts, axis=1, sort=True) if parts else pd.DataFrame()
+
+    monkeypatch.setattr(yf.Ticker, "history", history)
+    monkeypatch.setattr(yf, "download", download)
+    monkeypatch.setattr(data, "cache", SWRCache())
+    monkeypatch.setattr(data, "_store", data.BarStore(str(tmp_path / "bars.sqlite")))
+    return frames
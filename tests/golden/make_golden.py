@@ -0,0 +1,102 @@
+# --- 指標黃金值：供 tests/test_indicators.py 比對 ---
+# 黃金值由 reference_indicators 產生：逐行照抄 pandas_ta 0.3.14b 公式的 pandas 版本，不需安裝 pandas_ta；
+# 與 pandas_ta 本身的比對在 test_golden_values_match_pandas_ta (pip install -r requirements-dev.txt)
+# 用法：python tests/golden/make_golden.py
+# 輸入為固定種子的模擬日線，中段插入 15 根平盤 (KD 高低區間為 0，走 epsilon 分支；
+# 不到 20 根，避開布林標準差為 0 的情況，那時 pandas rolling var 只剩捨入誤差，結果隨 pandas 版本而異)；
+# 每個 start 代表一檔從第 start 根才上市，另外單獨算一次 (暖身期從上市日起算)
+import os
+import sys
+import numpy as np
+
+GOLDEN_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.dirname(os.path.dirname(GOLDEN_DIR)), os.path.join(os.path.dirname(os.path.dirname(GOLDEN_DIR)), "bench")]
+import pandas as pd
+from fixtures import synthetic_history
+
+BARS = 150
+STARTS = (0, 40, 100)
+
+
+def golden_input():
+    df = synthetic_history("2330.TW", BARS).reset_index(drop=True)
+    df.loc[70:84, ["Open", "High", "Low", "Close"]] = df.loc[69, "Close"]
+    return df
+
+
+def _non_zero_range(high, low):
+    # pandas_ta.utils.non_zero_range：只要有一格區間為 0，整欄加上 epsilon
+    diff = high - low
+    if diff.eq(0).any(): diff = diff + sys.float_info.epsilon
+    return diff
+
+
+def _sma(x, n):
+    return x.rolling(n, min_periods=n).mean()
+
+
+def _ema(x, n):
+    # pandas_ta ema (sma=True)：前 n 根的平均當種子，之後 adjust=False 遞迴
+    x = x.copy()
+    seed = x[0:n].mean()
+    x[:n - 1] = np.nan
+    x.iloc[n - 1] = seed
+    return x.ewm(span=n, adjust=False).mean()
+
+
+def _rma(x, n):
+    return x.ewm(alpha=1 / n, min_periods=n).mean()
+
+
+def reference_indicators(df):
+    close, high, low = df["Close"], df["High"], df["Low"]
+    out = pd.DataFrame(index=df.index)
+    for n in (5, 20, 60): out[f"SMA_{n}"] = _sma(close, n)
+
+    negative = close.diff(1)
+    positive = negative.copy()
+    positive[positive < 0], negative[negative > 0] = 0, 0
+    up, down = _rma(positive, 14), _rma(negative, 14)
+    out["RSI_14"] = 100 * up / (up + down.abs())
+
+    lowest, highest = low.rolling(14).min(), high.rolling(14).max()
+    stoch = 100 * (close - lowest) / _non_zero_range(highest, lowest)
+    k = _sma(stoch.loc[stoch.first_valid_index():], 3)
+    out["STOCHk_14_3_3"], out["STOCHd_14_3_3"] = k, _sma(k.loc[k.first_valid_index():], 3)
+
+    macd = _ema(close, 12) - _ema(close, 26)
+    signal = _ema(macd.loc[macd.first_valid_index():], 9)
+    out["MACD_12_26_9"], out["MACDh_12_26_9"], out["MACDs_12_26_9"] = macd, macd - signal, signal
+
+    std = close.rolling(20, min_periods=20).var(ddof=0).apply(np.sqrt)
+    mid = _sma(close, 20)
+    lower, upper = mid - 2 * std, mid + 2 * std
+    width = _non_zero_range(upper, lower)
+    out["BBL_20_2.0"], out["BBM_20_2.0"], out["BBU_20_2.0"] = lower, mid, upper
+    out["BBB_20_2.0"], out["BBP_20_2.0"] = 100 * width / mid, _non_zero_range(close, lower) / width
+    return out
+
+
+def pandas_ta_indicators(df):
+    import pandas_ta  # noqa: F401
+    df = df.copy()
+    df.ta.sma(length=5, append=True)
+    df.ta.sma(length=20, append=True)
+    df.ta.sma(length=60, append=True)
+    df.ta.rsi(length=14, append=True)
+    df.ta.stoch(append=True)
+    df.ta.macd(append=True)
+    df.ta.bbands(length=20, std=2, append=True)
+    return df
+
+
+def main():
+    from indicators import COLUMNS
+    df = golden_input()
+    df.to_csv(os.path.join(GOLDEN_DIR, "ohlc.csv"), index_label="bar")
+    parts = [reference_indicators(df.iloc[start:])[COLUMNS].assign(start=start) for start in STARTS]
+    pd.concat(parts).to_csv(os.path.join(GOLDEN_DIR, "indicators.csv"), index_label="bar")
+
+
+if __name__ == "__main__":
+    main()
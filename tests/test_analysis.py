@@ -0,0 +1,41 @@
+import json
+import numpy as np
+import pandas as pd
+from analysis import _num, diagnose
+
+
+def frame(close):
+    close = np.asarray(close, dtype=float)
+    index = pd.date_range("2024-01-01", periods=len(close), freq="B", tz="Asia/Taipei")
+    return pd.DataFrame({"Open": close, "High": close * 1.001, "Low": close * 0.999, "Close": close,
+                         "Volume": np.full(len(close), 1e6)}, index=index)
+
+
+def test_num_handles_numpy_nan():
+    assert _num(np.float64("nan")) is None
+    assert _num(np.array(np.nan)) is None
+    assert _num(np.array(1.5)) == 1.5 and type(_num(np.array(1.5))) is float
+    assert _num(None) is None
+
+
+def test_new_low_has_no_support():
+    df = frame(np.r_[np.full(79, 100.0), 60.0])
+    report = diagnose(df)
+    assert report["support"] == {"price": None, "name": "無"}
+    assert report["resistance"]["price"] is not None
+    json.dumps(report, allow_nan=False)
+
+
+def test_new_high_at_close_has_no_resistance():
+    df = frame(np.r_[np.full(79, 100.0), 150.0])
+    df.iloc[-1, df.columns.get_loc("High")] = 150.0
+    report = diagnose(df)
+    assert report["resistance"] == {"price": None, "name": "無"}
+    json.dumps(report, allow_nan=False)
+
+
+def test_short_history_is_strict_json():
+    # 5 日資料：月線 / 季線 / 布林都還沒算出來
+    report = diagnose(frame([100, 101, 99, 102, 103]))
+    assert report["indicators"]["sma20"] is None
+    json.dumps(report, allow_nan=False)
@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+from backtest import evaluate
+from fixtures import synthetic_history
+
+FIELDS = ("Open", "High", "Low", "Close", "Volume")
+
+
+def panel(frames):
+    return {k: pd.DataFrame({s: df[k] for s, df in frames.items()}) for k in FIELDS}
+
+
+def test_suspension_does_not_add_flat_bars():
+    # 停牌期間整段缺值：結果要和把那段直接拿掉 (只看有成交的日子) 完全相同
+    df = synthetic_history("2330.TW", 400)
+    gapped = df.copy()
+    gapped.iloc[200:260] = np.nan
+    pd.testing.assert_frame_equal(evaluate(panel({"2330.TW": gapped})), evaluate(panel({"2330.TW": df.drop(df.index[200:260])})))
+
+
+def test_delisted_symbol_contributes_only_traded_bars():
+    listed, delisted = synthetic_history("2330.TW", 400), synthetic_history("2317.TW", 400)
+    gone = delisted.copy()
+    gone.iloc[150:] = np.nan  # 第 150 根後下市，不該再產生 0% 報酬、0% 回檔的樣本
+    both = evaluate(panel({"2330.TW": listed, "2317.TW": gone}))
+    alone = [evaluate(panel({"2330.TW": listed})), evaluate(panel({"2317.TW": delisted.iloc[:150]}))]
+    total = sum(r["樣本數"].reindex(both.index, fill_value=0) for r in alone)
+    pd.testing.assert_series_equal(both["樣本數"], total)
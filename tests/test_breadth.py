@@ -0,0 +1,40 @@
+import pytest
+import breadth
+import data
+import standin
+from conftest import recent
+
+
+@pytest.fixture
+def tw_api(monkeypatch, upstream):
+    # Yahoo 奇摩 API 指向替身伺服器；成分股 K 線由假 yfinance 提供
+    server, base = standin.start()
+    monkeypatch.setattr(data, "SECTOR_RANK_URL", data.SECTOR_RANK_URL.replace(data.TW_API, base + "/tw"))
+    monkeypatch.setattr(breadth, "QUOTES_URL", breadth.QUOTES_URL.replace(data.TW_API, base + "/tw"))
+    members = {name: standin._members(i + 1) for i, name in enumerate(standin.SECTORS)}
+    for symbols in members.values():
+        upstream.update({s: recent(s) for s in symbols})
+    yield members
+    server.shutdown()
+
+
+def test_breadth_against_standin(tw_api, monkeypatch):
+    calls = []
+    fetch = data.fetch_tw_hot_sectors
+    monkeypatch.setattr(data, "fetch_tw_hot_sectors", lambda: calls.append(None) or fetch())
+    sectors = data.get_tw_hot_sectors(fresh=True)
+    result = breadth.get_sector_breadth(fresh=True)
+    assert len(calls) == 1  # 族群排行只抓一次，兩邊共用
+
+    summary = result["summary"].set_index("族群名稱")
+    assert list(summary.index) == list(sectors["族群名稱"])
+    assert summary["漲跌幅"].tolist() == sectors["漲跌幅"].tolist()
+    for name, symbols in tw_api.items():
+        rows = result["members"][name]
+        assert sorted(rows["代號"]) == sorted(symbols)  # 分頁全部抓齊
+        assert summary.loc[name, "家數"] == len(symbols)
+        close = {s: recent(s)["Close"] for s in symbols}
+        above = sum(c.iloc[-1] > c.iloc[-breadth.SMA_LENGTH:].mean() for c in close.values())
+        assert summary.loc[name, "站上月線"] == above
+        change = rows["漲跌幅"]
+        assert summary.loc[name, "上漲比%"] == round((change > 0).mean() * 100, 1)
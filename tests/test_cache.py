@@ -0,0 +1,78 @@
+import threading
+import time
+import pytest
+from cache import SWRCache
+from perf import recorder, span
+
+
+def counter():
+    calls = []
+
+    def loader():
+        calls.append(None)
+        return len(calls) - 1
+    return loader, calls
+
+
+def test_stale_value_served_while_refreshing():
+    cache = SWRCache()
+    loader, _ = counter()
+    assert cache.get("k", loader, 0) == 0
+    assert cache.get("k", loader, 0) == 0  # 過期：先回舊值，背景更新
+    future = cache._inflight.get("k")
+    if future is not None: future.result(timeout=5)
+    assert cache.stats["stale"] == 1
+
+
+def test_allow_stale_false_reloads_synchronously():
+    cache = SWRCache()
+    loader, _ = counter()
+    assert cache.get("k", loader, 0) == 0
+    assert cache.get("k", loader, 0, allow_stale=False) == 1
+    assert cache.get("k", loader, 60, allow_stale=False) == 2
+    assert cache.get("k", loader, 60, allow_stale=False) == 2  # 未過期照樣命中
+
+
+def test_allow_stale_false_joins_inflight_refresh():
+    cache = SWRCache()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(None)
+        if len(calls) > 1: release.wait(5)
+        return len(calls)
+    assert cache.get("k", slow, 0) == 1
+    assert cache.get("k", slow, 0) == 1  # 背景更新開始並卡住
+    result = []
+    t = threading.Thread(target=lambda: result.append(cache.get("k", slow, 0, allow_stale=False)))
+    t.start()
+    time.sleep(0.05)
+    release.set()
+    t.join(5)
+    assert result == [2] and len(calls) == 2
+
+
+def test_allow_stale_false_raises_on_failure():
+    cache = SWRCache()
+    assert cache.get("k", lambda: 0, 0) == 0
+
+    def boom(): raise RuntimeError("upstream down")
+    with pytest.raises(RuntimeError):
+        cache.get("k", boom, 0, allow_stale=False)
+    assert cache.get("k", boom, 0) == 0  # 一般讀取仍拿得到舊值
+
+
+def test_background_refresh_is_traced_under_caller_span():
+    recorder.clear()
+    cache = SWRCache()
+    assert cache.get("k", lambda: 0, 0) == 0
+
+    def boom(): raise RuntimeError("upstream down")
+    with span("history"):
+        assert cache.get("k", boom, 0) == 0  # 舊值先回，更新丟到背景
+    cache._pool.shutdown(wait=True)
+    refresh = [r for r in recorder.records() if r["stage"] == "refresh"]
+    assert len(refresh) == 1
+    assert refresh[0]["parent"] == "history" and refresh[0]["errors"] == 1
+    assert refresh[0]["error"] == "RuntimeError: upstream down"
@@ -0,0 +1,81 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+import numpy as np
+import pandas as pd
+import pytest
+import data
+from cache import bars_stale, last_settled
+from conftest import recent
+
+
+def test_empty_history_is_not_cached(upstream):
+    assert data.get_history("2330.TW").empty
+    assert not data.cache._entries
+    upstream["2330.TW"] = recent("2330.TW")
+    assert len(data.get_history("2330.TW")) > 100  # 上游恢復後立即取得，不必等 market_ttl
+
+
+def test_failed_quotes_raise_and_keep_old_value(upstream):
+    tickers = ("^DJI", "^VIX")
+    with pytest.raises(data.NoDataError):
+        data.get_index_quotes(tickers)
+    assert not data.cache._entries
+    upstream["^DJI"] = recent("^DJI", 5)
+    quotes = data.get_index_quotes(tickers)
+    assert quotes["^DJI"] is not None and quotes["^VIX"] is None  # 單檔失敗只影響該檔
+    # 過期後上游整批失敗：同步重抓丟出例外，一般讀取仍拿到舊值
+    upstream.clear()
+    key = ("quotes", tickers)
+    data.cache._entries[key] = (quotes, 0)
+    with pytest.raises(data.NoDataError):
+        data.get_index_quotes(tickers, fresh=True)
+    assert data.get_index_quotes(tickers) is quotes
+
+
+@pytest.mark.parametrize("panel", [False, True])
+def test_incremental_fetch_refetches_after_adjustment(upstream, panel, monkeypatch):
+    store = data.get_store()
+    monkeypatch.setattr(data, "bars_stale", lambda *args: True)  # 每次都向上游增量補抓
+    read = (lambda: store.history_panel(["2330.TW"])["Close"]["2330.TW"]) if panel else (lambda: store.history("2330.TW")["Close"])
+    df = recent("2330.TW")
+    upstream["2330.TW"] = df
+    read()
+    # 除息後 Yahoo 回溯調整整段價格，重疊的那根收盤就對不上了
+    adjusted = df.copy()
+    adjusted[["Open", "High", "Low", "Close"]] *= 0.97
+    upstream["2330.TW"] = adjusted
+    close = read()
+    np.testing.assert_allclose(close.to_numpy(), adjusted["Close"].iloc[-len(close):].to_numpy())
+    # 沒有調整時照常增量：新的一根接在後面
+    upstream["2330.TW"] = pd.concat([adjusted, adjusted.iloc[[-1]].set_axis(adjusted.index[-1:] + pd.Timedelta(days=1))])
+    assert read().iloc[-1] == adjusted["Close"].iloc[-1]
+
+
+def test_bars_stale_uses_settle_boundary_not_forward_ttl():
+    tpe = ZoneInfo("Asia/Taipei")
+    synced = datetime(2026, 10, 16, 11, 0, tzinfo=tpe).timestamp()  # 週五盤中同步
+    assert not bars_stale("TW", synced, 60, now=datetime(2026, 10, 16, 11, 0, 30, tzinfo=tpe))
+    assert bars_stale("TW", synced, 60, now=datetime(2026, 10, 16, 11, 2, tzinfo=tpe))
+    # 收盤後 / 週末：盤中那次同步早於結算點，必須再補一次
+    for now in (datetime(2026, 10, 16, 18, 0, tzinfo=tpe), datetime(2026, 10, 18, 12, 0, tzinfo=tpe)):
+        assert bars_stale("TW", synced, 60, now=now)
+    # 結算後同步過就是最終值，一路用到下次開盤
+    settled = datetime(2026, 10, 16, 14, 45, tzinfo=tpe).timestamp()
+    assert not bars_stale("TW", settled, 60, now=datetime(2026, 10, 18, 12, 0, tzinfo=tpe))
+    assert bars_stale("TW", settled, 60, now=datetime(2026, 10, 19, 9, 5, tzinfo=tpe))
+
+
+def test_mid_session_sync_is_refreshed_after_close(upstream):
+    df = recent("2330.TW")
+    partial = df.copy()
+    partial.iloc[-1, partial.columns.get_loc("Close")] *= 0.9  # 盤中抓到的半成品
+    upstream["2330.TW"] = partial
+    store = data.get_store()
+    assert data.get_history("2330.TW")["Close"].iloc[-1] == partial["Close"].iloc[-1]
+    # 最後同步在上一個結算點之前 (收盤前 5 小時)
+    with store.lock:
+        store.conn.execute("UPDATE meta SET fetched_at=?", (last_settled("TW") - 5 * 3600,))
+        store.conn.commit()
+    upstream["2330.TW"] = df
+    data.cache.clear()
+    assert data.get_history("2330.TW")["Close"].iloc[-1] == df["Close"].iloc[-1]
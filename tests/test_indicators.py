@@ -0,0 +1,73 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from indicators import COLUMNS, IndicatorState, compute
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+OHLC = pd.read_csv(os.path.join(GOLDEN_DIR, "ohlc.csv"), index_col="bar")
+GOLDEN = pd.read_csv(os.path.join(GOLDEN_DIR, "indicators.csv"), index_col="bar")
+STARTS = sorted(GOLDEN["start"].unique())
+
+
+def expected(start):
+    return GOLDEN.loc[GOLDEN["start"] == start, COLUMNS].to_numpy()
+
+
+def assert_golden(actual, golden):
+    # 暖身期 (NaN) 的位置必須完全一致，其餘數值容許浮點誤差
+    np.testing.assert_array_equal(np.isnan(actual), np.isnan(golden))
+    np.testing.assert_allclose(actual, golden, rtol=1e-9, atol=1e-9, equal_nan=True)
+
+
+@pytest.mark.parametrize("start", STARTS)
+def test_compute_matches_golden(start):
+    assert_golden(compute(OHLC.iloc[start:]), expected(start))
+
+
+def test_compute_2d_staggered_listing():
+    # 每一欄從 start 根才上市，之前全為 NaN；結果要等於該檔單獨計算
+    panel = {k: np.full((len(OHLC), len(STARTS)), np.nan) for k in ("High", "Low", "Close")}
+    for j, start in enumerate(STARTS):
+        for k in panel: panel[k][start:, j] = OHLC[k].to_numpy()[start:]
+    out = compute(panel)
+    for j, start in enumerate(STARTS):
+        assert np.isnan(out[:start, :, j]).all()
+        assert_golden(out[start:, :, j], expected(start))
+
+
+def test_indicator_state_matches_golden():
+    state = IndicatorState()
+    rows = [state.update(*bar) for bar in OHLC.itertuples(index=False)]
+    actual = np.array([[row[c] for c in COLUMNS] for row in rows], dtype=float)
+    assert_golden(actual, expected(0))
+
+
+def test_indicator_state_replace_matches_golden():
+    # 盤中每根先送兩次未收完的值，再以收盤值覆寫
+    state = IndicatorState()
+    rows = []
+    for bar in OHLC.itertuples(index=False):
+        state.update(bar.Open, bar.Open, bar.Open, bar.Open, 0.0)
+        state.update(bar.Open, bar.High, bar.Low, (bar.High + bar.Low) / 2, bar.Volume / 2, replace=True)
+        rows.append(state.update(*bar, replace=True))
+    actual = np.array([[row[c] for c in COLUMNS] for row in rows], dtype=float)
+    assert_golden(actual, expected(0))
+
+
+def test_golden_values_match_reference():
+    # 黃金值檔必須能由 make_golden 的 pandas 公式重現 (檔案沒有被手改)
+    from golden.make_golden import reference_indicators
+    for start in STARTS:
+        assert_golden(reference_indicators(OHLC.iloc[start:])[COLUMNS].to_numpy(), expected(start))
+
+
+def test_golden_values_match_pandas_ta():
+    # 有安裝 pandas_ta 時 (requirements-dev.txt)，直接與它比對：驗證 pandas 公式照抄無誤
+    pytest.importorskip("pandas_ta")
+    from golden.make_golden import pandas_ta_indicators, reference_indicators
+    for start in STARTS:
+        theirs = pandas_ta_indicators(OHLC.iloc[start:])[COLUMNS].to_numpy()
+        assert_golden(reference_indicators(OHLC.iloc[start:])[COLUMNS].to_numpy(), theirs)
+        assert_golden(theirs, expected(start))
+        assert_golden(compute(OHLC.iloc[start:]), theirs)
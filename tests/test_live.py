@@ -0,0 +1,40 @@
+import pandas as pd
+import pytest
+from analysis import diagnose
+from fixtures import synthetic_history
+from indicators import add_indicators
+from live import LiveSession, ReplayFeed
+
+
+def tape(bars, warmup):
+    # warmup 之後每一根先出現兩次盤中更新 (收在開盤與收盤之間，量逐步累加)，最後才是收完的值
+    rows = [bars.iloc[:warmup]]
+    for ts, bar in bars.iloc[warmup:].iterrows():
+        for frac in (1 / 3, 2 / 3):
+            close = bar.Open + (bar.Close - bar.Open) * frac
+            rows.append(pd.DataFrame({"Open": bar.Open, "High": max(bar.Open, close), "Low": min(bar.Open, close),
+                                      "Close": close, "Volume": bar.Volume * frac}, index=[ts]))
+        rows.append(bars.loc[[ts]])
+    return pd.concat(rows)
+
+
+def assert_same_report(actual, expected):
+    assert actual.keys() == expected.keys()
+    for key, value in expected.items():
+        if isinstance(value, dict): assert_same_report(actual[key], value)
+        elif isinstance(value, float): assert actual[key] == pytest.approx(value, rel=1e-9, abs=1e-9), key
+        else: assert actual[key] == value, key
+
+
+def test_live_report_matches_batch_diagnosis_on_every_poll():
+    bars = synthetic_history("2330.TW", 180, "1m")
+    feed = ReplayFeed(tape(bars, 100), warmup=100)
+    session = LiveSession(feed)
+    assert_same_report(session.report(), diagnose(add_indicators(feed.history())))
+    polls = 0
+    while feed.cursor < len(feed.bars):
+        session.poll()
+        polls += 1
+        assert_same_report(session.report(), diagnose(add_indicators(feed.history())))
+    assert polls == 3 * 80
+    assert session.last_ts == bars.index[-1]
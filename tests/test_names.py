@@ -0,0 +1,44 @@
+import pytest
+import names
+from perf import recorder
+
+
+class Reply:
+    def __init__(self, rows): self.rows = rows
+    def raise_for_status(self): pass
+    def json(self): return self.rows
+
+
+def test_empty_bulk_list_is_a_failure(monkeypatch, tmp_path):
+    monkeypatch.setattr(names.session, "get", lambda url, **kwargs: Reply([{"代號": "2330", "名稱": "台積電"}]))
+    directory = names.NameDirectory(str(tmp_path / "names.json"))
+    with pytest.raises(names.NoDataError):
+        directory.warm()  # 欄位改名：一筆都對不上
+    assert directory.updated == 0
+
+
+def test_refresh_loop_backs_off_after_empty_reply(monkeypatch, tmp_path):
+    recorder.clear()
+    monkeypatch.setattr(names.session, "get", lambda url, **kwargs: Reply([]))
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) == 3: raise SystemExit  # 跑三輪就離開迴圈
+    monkeypatch.setattr(names.time, "sleep", sleep)
+    with pytest.raises(SystemExit):
+        names.NameDirectory(str(tmp_path / "names.json"))._refresh_loop()
+    assert sleeps == [names.RETRY_INTERVAL] * 3
+    errors = [r for r in recorder.records() if r["stage"] == "name_refresh"]
+    assert len(errors) == 3 and all(r["errors"] == 1 for r in errors)
+
+
+def test_name_span_records_directory_hits_and_misses(monkeypatch, tmp_path):
+    recorder.clear()
+    directory = names.NameDirectory(str(tmp_path / "names.json"))
+    directory.names = {"2330.TW": "台積電"}
+    monkeypatch.setattr(names, "get_directory", lambda: directory)
+    monkeypatch.setattr(names, "_remote_name", lambda stock_id: "蘋果")
+    assert names.get_stock_name("2330") == "台積電"
+    assert names.get_stock_name("AAPL") == "蘋果"
+    assert [r["cache"] for r in recorder.records() if r["stage"] == "name"] == [{"hit": 1}, {"miss": 1}]
@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+import data
+from analysis import diagnose
+from conftest import recent
+from screener import scan
+
+
+def test_panel_aligns_markets_on_local_trading_date(upstream):
+    tw, us = recent("2330.TW"), recent("AAPL")
+    us.index = tw.index.tz_localize(None).tz_localize("America/New_York")  # 兩邊當地日期相同
+    upstream["2330.TW"], upstream["AAPL"] = tw, us
+    wide = data.get_store().history_panel(["2330.TW", "AAPL"])
+    assert wide["Close"].index.tz is None
+    assert wide["Close"].notna().all().all()  # 同一天同一列，不會交錯出缺值
+
+
+def test_mixed_watchlist_does_not_change_scores(upstream):
+    tw, us = recent("2330.TW"), recent("AAPL")
+    upstream["2330.TW"], upstream["AAPL"] = tw.drop(tw.index[-10]), us.drop(us.index[-5])  # 兩邊假日不同
+    alone = scan(["2330.TW"], data.get_store())
+    mixed = scan(["2330.TW", "AAPL"], data.get_store())
+    pd.testing.assert_series_equal(alone.loc["2330.TW"], mixed.loc["2330.TW"])
+    assert set(mixed.index) == {"2330.TW", "AAPL"}
+
+
+def test_gapped_symbols_match_single_ticker_diagnosis(upstream):
+    full = recent("2317.TW")
+    halted = recent("2330.TW")
+    upstream["2317.TW"] = full
+    upstream["2330.TW"] = halted.drop(halted.index[-20:-12])  # 盤中停牌 8 根
+    upstream["2454.TW"] = recent("2454.TW").iloc[:-1]  # 今天停牌
+    result = scan(["2317.TW", "2330.TW", "2454.TW"], data.get_store())
+    for symbol in ("2317.TW", "2330.TW", "2454.TW"):
+        report = diagnose(data.get_store().history(symbol))
+        row = result.loc[symbol]
+        assert row["收盤"] == pytest.approx(report["close"])
+        assert row["漲跌幅"] == pytest.approx(report["change_pct"], abs=0.01)
+        assert row["趨勢分"] == report["score"]
+        assert row["支撐"] == pytest.approx(report["support"]["price"])
+        assert row["壓力"] == pytest.approx(report["resistance"]["price"])
+        assert row["量能比"] == pytest.approx(round(report["volume_ratio"], 2))